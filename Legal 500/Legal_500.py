@@ -1,6 +1,4 @@
 import time
-import pandas as pd
-from bs4 import BeautifulSoup
 import random
 import threading
 import tkinter as tk
@@ -8,13 +6,13 @@ from tkinter import messagebox, scrolledtext, Checkbutton, IntVar
 import queue
 import os
 import glob
-import csv  # Import CSV for logging
 import datetime # Import datetime for timestamps
 import re # Import regex for cleaning filenames
+from urllib.parse import urljoin
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Import selenium components
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -22,11 +20,77 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
+
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.driver_pool import DriverPool, launch_driver
+from common.resource_blocking import PageWeightReport, apply_to_options, apply_to_driver
+from common.rate_limit import AdaptiveRateLimiter
+from common.browser_watchdog import BrowserWatchdog
+from ranking_store import RankingStore, merge_ranking_workbooks
+from listing_cache import ListingCache
+from page_parsing import make_soup, parse_ranking_page, parse_uk_regions, ranking_row
+from page_cache import RankingPageCache, normalize_url
+from event_log import EventLogWriter, FORMATS as EVENT_LOG_FORMATS
 
 # The base URL of the website
 BASE_URL = "https://www.legal500.com"
 
+# Root directory for all regions' output
+OUTPUT_DIR = "Legal500_Scraped_Data"
+
+# --- NEW: Listing cache (region map and per-region firm directories) ---
+REGION_CACHE_FILE = os.path.join(OUTPUT_DIR, "uk_regions.json")
+REGION_CACHE_TTL_HOURS = 24 * 7     # Region map is reused for a week, then revalidated
+DIRECTORY_CACHE_TTL_HOURS = 24      # Firm directories are reused for a day, then revalidated
+
+# --- NEW: Ranking and firm pages read in one region are reused by the others (and by later runs) ---
+RANKING_PAGE_CACHE_FILE = os.path.join(OUTPUT_DIR, "ranking_pages.sqlite")
+RANKING_PAGE_CACHE_TTL_HOURS = 24   # 0 turns the cache off
+
+# --- NEW: Per-region event log, written by a background thread ("csv" or the more compact "jsonl") ---
+EVENT_LOG_FORMAT = "csv"
+
+# --- NEW: GUI log rendering: the widget keeps only recent lines, the full log goes to disk ---
+GUI_LOG_FILE = os.path.join(OUTPUT_DIR, "scraper_gui.log")
+LOG_WIDGET_MAX_LINES = 5000    # Lines kept in the log widget...
+LOG_WIDGET_TRIM_LINES = 1000   # ...oldest lines dropped at once when it overflows
+LOG_BATCH_MAX_MESSAGES = 2000  # Messages rendered per 100 ms tick; the rest wait for the next one
+
+# --- NEW: A browser is replaced after serving this many pages (firm + ranking pages) ---
+DRIVER_MAX_PAGES = 400
+# --- NEW: ...or when its process tree crosses these limits, or it stops answering (see common/browser_watchdog.py) ---
+BROWSER_MAX_RSS_MB = 1500
+BROWSER_MAX_HANDLES = 4000
+BROWSER_MAX_TABS = 8
+
+# --- NEW: Request-blocking profile ("off" or "light", see common/resource_blocking.py) ---
+RESOURCE_BLOCKING_PROFILE = "light"
+RESOURCE_BLOCKING_REPORT = False # Log requests/bytes per ranking page and what was blocked
+
+# --- NEW: asyncio fetch core settings (used for HTTP ranking-page fetches) ---
+ASYNC_CONCURRENCY = 20       # Ranking pages in flight at once
+ASYNC_RATE_PER_HOST = 2.0    # Requests per second against legal500.com
+
+# --- NEW: How a firm's ranking pages are fetched ---
+# "tabs":    Ctrl+click ranking cards in batches and switch between the opened tabs (original behaviour)
+# "http":    collect the ranking hrefs once and fetch them concurrently over HTTP; pages that fail fall back to "browser"
+# "browser": collect the ranking hrefs once and load them concurrently in pooled browsers
+RANKING_FETCH_MODE = "http"
+BROWSER_FETCH_WORKERS = 4    # Pooled browsers loading ranking pages at once in "browser" mode
+
+# --- NEW: Regions scraped at once, each with its own browser, folder and CSV log ---
+REGION_WORKERS = 3
+# Page loads and HTTP requests per second against legal500.com, shared by every region worker.
+# --- UPDATED: Adaptive (AIMD): starts here, climbs while the site keeps up, halves when it pushes back ---
+SITE_REQUESTS_PER_SECOND = 3.0
+SITE_MIN_REQUESTS_PER_SECOND = 0.2
+SITE_MAX_REQUESTS_PER_SECOND = 12.0
+# Page titles that mean the site is refusing or throttling us
+BLOCK_PAGE_MARKERS = ("access denied", "too many requests", "request blocked", "just a moment", "attention required", "captcha", "unusual traffic")
+# Firm-page texts that mean the firm really has no rankings (so it can be marked complete with none)
+FIRM_NO_RANKINGS_MARKERS = ("no rankings", "not currently ranked", "has not been ranked")
+
 # --- UPDATED: 18 modern user-agents ---
 USER_AGENTS = [
     # Chrome (Win, Mac, Linux)
@@ -56,55 +120,88 @@ USER_AGENTS = [
 
 # --- Global Flags & Shared Resources ---
 exit_requested = False
-log_queue = queue.Queue()
+
+class RegionLogQueue(queue.Queue):
+    """GUI log queue that labels messages put by region worker threads with their region."""
+
+    def __init__(self):
+        super().__init__()
+        self.context = threading.local()
+
+    def put(self, item, block=True, timeout=None):
+        region = getattr(self.context, "region", None)
+        if region:
+            message, tag = item if isinstance(item, tuple) else (item, "info")
+            body = message.lstrip("\n")
+            item = (message[:len(message) - len(body)] + f"[{region}] " + body, tag)
+        super().put(item, block, timeout)
+
+    def in_region(self, function):
+        """Wraps `function` so messages it puts from another thread (e.g. a pool worker) carry the caller's region."""
+        region = getattr(self.context, "region", None)
+        def run(*args, **kwargs):
+            previous = getattr(self.context, "region", None)
+            self.context.region = region
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.context.region = previous
+        return run
+
+log_queue = RegionLogQueue()
 scraper_thread_running = False # Flag to track scraper status
+ranking_page_cache = None # Opened by run_scraper, shared by every region worker
+http_fetcher = None # --- NEW: One asyncio fetch core (connection pool + per-host buckets) for every firm and region ---
 
-# --- UPDATED: CSV Log Opener (now takes folder path) ---
+# --- UPDATED: Region log opener; the log is written by a background thread (see event_log.py) ---
 def open_csv_writer(region_folder_path, region_name, mode='w'):
     """
-    Opens a CSV file for a given region *inside its folder* and returns the file and writer objects.
+    Opens the event log for a given region *inside its folder* and returns its writer.
     'w' mode is for writing (creates new file/overwrites).
     'a' mode is for appending (adds to existing file).
     """
     safe_region_name = re.sub(r'[\\/*?:"<>|]', "", region_name)
-    csv_filename = f"log_region_{safe_region_name}.csv"
+    csv_filename = f"log_region_{safe_region_name}{EVENT_LOG_FORMATS[EVENT_LOG_FORMAT]}"
     # UPDATED: Use os.path.join to create path inside the folder
     full_csv_path = os.path.join(region_folder_path, csv_filename)
     
     # Use a symbolic log message for the GUI
     log_queue.put( (f"📝 Opening regional log: {full_csv_path} (Mode: {mode})", "info") )
     
-    # Ensure encoding is 'utf-8' for broad compatibility
-    csv_file = open(full_csv_path, mode, newline='', encoding='utf-8')
-    csv_writer = csv.writer(csv_file)
-    
-    # Only write the header if we are in 'write' mode (new file)
-    if mode == 'w':
-        # UPDATED Header: Removed Logo URL, added detailed columns
-        csv_writer.writerow(["FirmName", "Timestamp", "LogLevel", "Practice Area", "Ranking Table", "Firm", "Sourcelink"])
-        
-    return csv_file, csv_writer
+    # The header is only written to a new (or empty) file
+    def on_error(error):
+        log_queue.put( (f"❌ Event log for {region_name} stopped writing ({error}); further events are dropped.", "error") )
+    return EventLogWriter(full_csv_path, fmt=EVENT_LOG_FORMAT, mode=mode, on_error=on_error)
 
 # --- NEW: Simple CSV Log Writer ---
 def write_simple_csv_log(csv_writer, firm_name, level, message):
     """
     Helper function to write a simple status log entry (like 'Starting scrape').
     It fills the main message columns and leaves the detail columns blank.
+    Only queues the event; timestamping and formatting happen on the writer thread.
     """
     try:
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # Sanitize message just in case it contains commas or newlines
-        clean_message = str(message).replace('"', '""').replace('\n', ' ')
-        
-        # Get the new 7-column row format
-        # We put the simple message in the "LogLevel" column as it's a general status
-        # FirmName, Timestamp, LogLevel(Message), PA, Tier, Firm, Link
-        csv_writer.writerow([firm_name, timestamp, level, f'"{clean_message}"', "", "", ""])
+        csv_writer.event(firm_name, level, message)
     except Exception as e:
         # If logging fails, print to GUI queue to avoid crashing
         log_queue.put( (f"!! CSV LOGGING FAILED: {e} !!", "error") )
 
 
+# --- NEW: Tag assigned by a message's leading symbol (overrides the tag it was queued with) ---
+MESSAGE_TAG_PREFIXES = (
+    (("✅",), "success"),
+    (("❌",), "error"),
+    (("⚠️",), "warning"),
+    (("💾", "🕵️", "📝"), "info"),
+    (("🏁", "🛑", "=", "─", "⚙️", "📍"), "header"),
+)
+
+def message_tag(message, tag="info"):
+    for prefixes, prefix_tag in MESSAGE_TAG_PREFIXES:
+        if message.startswith(prefixes):
+            return prefix_tag
+    return tag
+
 # --- GUI Application Class ---
 class ScraperApp:
     def __init__(self, root):
@@ -130,6 +227,14 @@ class ScraperApp:
         
         tk.Button(control_frame, text="Select All", command=self.select_all).pack(fill='x', pady=2)
         tk.Button(control_frame, text="Deselect All", command=self.deselect_all).pack(fill='x', pady=2)
+        # --- NEW: Manual refresh of the cached region map / firm directories ---
+        self.refresh_regions_button = tk.Button(control_frame, text="Refresh Regions", command=self.refresh_regions)
+        self.refresh_regions_button.pack(fill='x', pady=2)
+        self.refresh_directories = IntVar()
+        Checkbutton(control_frame, text="Refresh firm directories", variable=self.refresh_directories).pack(anchor='w')
+        # --- NEW: Untick to read back through the log without it jumping to the end ---
+        self.autoscroll = IntVar(value=1)
+        Checkbutton(control_frame, text="Autoscroll log", variable=self.autoscroll).pack(anchor='w')
         
         self.start_button = tk.Button(control_frame, text="Start Scraping", command=self.start_scraping, bg="green", fg="white", font=("Helvetica", 10, "bold"))
         self.start_button.pack(fill='x', pady=10)
@@ -149,47 +254,90 @@ class ScraperApp:
         self.log_text.tag_configure("warning", foreground="#ff8c00")
         self.log_text.tag_configure("error", foreground="#d40000", font=("Courier New", 9, "bold"))
         
+        # --- NEW: Every message is also appended to the log file; the widget only shows the tail ---
+        self.log_file = None
+        try:
+            os.makedirs(os.path.dirname(GUI_LOG_FILE), exist_ok=True)
+            self.log_file = open(GUI_LOG_FILE, "a", encoding="utf-8")
+            tk.Label(log_frame, text=f"Last {LOG_WIDGET_MAX_LINES} lines shown. Full log: {GUI_LOG_FILE}", anchor='w').pack(fill='x')
+        except OSError as e:
+            tk.Label(log_frame, text=f"Last {LOG_WIDGET_MAX_LINES} lines shown. Log file unavailable: {e}", anchor='w').pack(fill='x')
+        
         self.root.after(100, self.process_log_queue)
         
         # --- Fetch regions on startup ---
-        threading.Thread(target=self.populate_regions, daemon=True).start()
+        self.load_regions()
 
     def log(self, message, tag="info"):
+        self.render_log([(message, tag)])
+
+    def render_log(self, entries):
+        """
+        Shows a batch of (message, tag) entries with a single insert, writes them to the
+        log file, trims the widget back under LOG_WIDGET_MAX_LINES and follows the end
+        only while autoscroll is on.
+        """
+        self.write_log_file(entries)
+
+        # Consecutive messages with the same tag are joined into one text/tag pair
+        chunks = []
+        for message, tag in entries:
+            if chunks and chunks[-1][1] == tag:
+                chunks[-1][0].append(message)
+            else:
+                chunks.append(([message], tag))
+        insert_args = []
+        for messages, tag in chunks:
+            insert_args += ["\n".join(messages) + "\n", (tag,)]
+
         # --- TCLERROR FIX: Wrap in try/except ---
         # This catches errors if the log runs *after* the window is destroyed
         try:
             self.log_text.configure(state='normal')
-            self.log_text.insert(tk.END, message + '\n', (tag,))
+            self.log_text.insert(tk.END, *insert_args)
+            line_count = int(self.log_text.index('end-1c').split('.')[0])
+            if line_count > LOG_WIDGET_MAX_LINES:
+                self.log_text.delete('1.0', f"{line_count - LOG_WIDGET_MAX_LINES + LOG_WIDGET_TRIM_LINES}.0")
             self.log_text.configure(state='disabled')
-            self.log_text.see(tk.END)
+            if self.autoscroll.get():
+                self.log_text.see(tk.END)
         except tk.TclError:
             pass # Ignore errors trying to write to a destroyed widget
 
-    def process_log_queue(self):
-        while not log_queue.empty():
+    def write_log_file(self, entries):
+        if self.log_file is None: return
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self.log_file.write("".join(f"{timestamp} [{tag}] {message}\n" for message, tag in entries))
+            self.log_file.flush()
+        except (OSError, ValueError):
+            self.log_file = None # Disk full or file closed; keep the GUI going
+
+    def drain_log_queue(self, limit=None):
+        """Up to `limit` queued messages as (message, tag) entries."""
+        entries = []
+        while limit is None or len(entries) < limit:
             try:
                 message_tuple = log_queue.get_nowait()
-                if isinstance(message_tuple, tuple):
-                    message, tag = message_tuple
-                else:
-                    message, tag = message_tuple, "info" # Default tag
-                
-                # --- NEW: Assign tag based on content ---
-                if message.startswith("✅"): tag = "success"
-                elif message.startswith("❌"): tag = "error"
-                elif message.startswith("⚠️"): tag = "warning"
-                elif message.startswith("💾") or message.startswith("🕵️") or message.startswith("📝"): tag = "info"
-                elif message.startswith("🏁") or message.startswith("🛑") or message.startswith("=") or message.startswith("─"): tag = "header"
-                elif message.startswith("⚙️") or message.startswith("📍"): tag = "header"
-                
-                self.log(message, tag)
-                
-            except tk.TclError:
-                pass # Ignore errors if window is destroyed while queue is full
+            except queue.Empty:
+                break
+            if isinstance(message_tuple, tuple):
+                message, tag = message_tuple
+            else:
+                message, tag = message_tuple, "info" # Default tag
+            entries.append((message, message_tag(message, tag)))
+        return entries
+
+    def process_log_queue(self):
+        # --- UPDATED: Drain a bounded batch and render it in one go ---
+        entries = self.drain_log_queue(LOG_BATCH_MAX_MESSAGES)
+        if entries:
+            self.render_log(entries)
         
         # New logic: Check if thread finished, then allow exit
         global scraper_thread_running
-        if not scraper_thread_running and exit_requested:
+        if not scraper_thread_running and exit_requested and log_queue.empty():
+             self.close_log_file()
              try:
                 self.root.destroy() # Now it's safe to destroy
              except tk.TclError:
@@ -198,10 +346,34 @@ class ScraperApp:
         
         self.root.after(100, self.process_log_queue)
 
-    def populate_regions(self):
+    def close_log_file(self):
+        """Writes any messages still queued to the log file, then closes it."""
+        if self.log_file is None: return
+        self.write_log_file(self.drain_log_queue())
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    def load_regions(self, refresh=False):
+        """Fetches the regions on a worker thread; Refresh stays disabled until the list is rebuilt."""
+        self.refresh_regions_button.config(state='disabled')
+        threading.Thread(target=self.fetch_regions, kwargs={"refresh": refresh}, daemon=True).start()
+
+    def fetch_regions(self, refresh=False):
+        # Worker thread: no widget access here, the rebuild is handed to the Tk thread
         log_queue.put( ("🗺️  Fetching UK regions...", "info") )
-        self.regions_data = get_uk_regions()
-        if self.regions_data:
+        regions = None
+        try:
+            regions = get_uk_regions(refresh=refresh)
+        finally:
+            self.root.after(0, self.populate_regions, regions)
+
+    def populate_regions(self, regions):
+        if regions:
+            self.regions_data = regions
+            for widget in self.region_frame.winfo_children():
+                widget.destroy()
+            self.check_vars = {}
             for name in sorted(self.regions_data.keys()):
                 var = tk.IntVar()
                 cb = tk.Checkbutton(self.region_frame, text=name, variable=var)
@@ -210,6 +382,13 @@ class ScraperApp:
             log_queue.put( (f"✅  Found {len(self.regions_data)} regions. Please make a selection.", "success") )
         else:
             log_queue.put( ("❌  Failed to fetch regions. Please check connection and restart.", "error") )
+        self.refresh_regions_button.config(state='normal')
+
+    def refresh_regions(self):
+        if scraper_thread_running:
+            messagebox.showwarning("In Progress", "Regions cannot be refreshed while scraping.")
+            return
+        self.load_regions(refresh=True)
 
     def select_all(self):
         for var in self.check_vars.values():
@@ -237,7 +416,7 @@ class ScraperApp:
         
         # Pass root object to the thread so it can signal completion
         # Thread is NOT a daemon, so app will wait for it.
-        threading.Thread(target=run_scraper, args=(selected_regions, self.regions_data, self.start_button, self.root)).start()
+        threading.Thread(target=run_scraper, args=(selected_regions, self.regions_data, self.start_button, self.root, self.refresh_directories.get() == 1)).start()
 
     def on_exit(self):
         global exit_requested
@@ -245,6 +424,7 @@ class ScraperApp:
         if not scraper_thread_running:
             # If not running, just destroy the window
             if messagebox.askokcancel("Exit", "Are you sure you want to exit?"):
+                self.close_log_file()
                 try:
                     self.root.destroy()
                 except tk.TclError:
@@ -260,8 +440,8 @@ class ScraperApp:
 
 # --- Scraper Functions ---
 
-def get_uk_regions():
-    """Fetches all available UK regions from the main rankings page."""
+def fetch_uk_regions():
+    """Loads the rankings page in a temporary browser and reads the region list. Returns (regions, validators)."""
     temp_driver = None
     try:
         chrome_options = Options()
@@ -269,8 +449,9 @@ def get_uk_regions():
         chrome_options.add_argument("--window-size=1920,1080")
         chrome_options.add_argument("--headless") # Consider running headless
         chrome_options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
-        service = Service(ChromeDriverManager().install())
-        temp_driver = webdriver.Chrome(service=service, options=chrome_options)
+        apply_to_options(chrome_options, RESOURCE_BLOCKING_PROFILE, site="legal500")
+        temp_driver = launch_driver(chrome_options)
+        apply_to_driver(temp_driver, RESOURCE_BLOCKING_PROFILE, site="legal500")
         temp_driver.get(f"{BASE_URL}/rankings#r/united-kingdom")
 
         log_queue.put( ("...Connecting to Legal500, please wait...", "info") )
@@ -284,13 +465,57 @@ def get_uk_regions():
         except TimeoutException: pass
         log_queue.put( ("...Locating region list...", "info") )
         region_list_ul = wait.until(EC.visibility_of_element_located((By.XPATH, "//h4[text()='Solicitors']/following-sibling::ul")))
-        soup = BeautifulSoup(region_list_ul.get_attribute('outerHTML'), 'html.parser')
-        return {link.text.strip(): link.get('href') for link in soup.find_all('a')}
+        return parse_uk_regions(region_list_ul.get_attribute('outerHTML')), {}
+    finally:
+        if temp_driver: temp_driver.quit()
+
+def revalidate_listing(url, entry, parse):
+    """
+    Conditional GET of a cached listing's page (If-None-Match / If-Modified-Since).
+    Returns a ListingCache revalidation outcome, or None when the page cannot be read
+    without a browser (the caller then does a full fetch).
+    """
+    import requests
+
+    validators = entry.get("validators") or {}
+    headers = {"User-Agent": random.choice(USER_AGENTS), "Accept-Language": "en-GB,en;q=0.9"}
+    if validators.get("etag"): headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"): headers["If-Modified-Since"] = validators["last_modified"]
+
+    site_limiter.acquire()
+    response = requests.get(url, headers=headers, timeout=15)
+    new_validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+    if response.status_code == 304:
+        return ListingCache.UNCHANGED, validators
+    if response.status_code != 200:
+        return None
+    value = parse(response.text)
+    if not value:
+        return None # Rendered client-side or blocked; needs the browser
+    if value == entry["value"]:
+        return ListingCache.UNCHANGED, new_validators
+    return ListingCache.CHANGED, value, new_validators
+
+def get_uk_regions(refresh=False):
+    """
+    All available UK regions, from the on-disk cache while it is fresh. A stale cache is
+    revalidated over HTTP before falling back to a browser; refresh=True always reloads.
+    """
+    cache = ListingCache(REGION_CACHE_FILE, REGION_CACHE_TTL_HOURS * 3600)
+    try:
+        regions, source = cache.get(
+            fetch_uk_regions,
+            revalidate=lambda entry: revalidate_listing(f"{BASE_URL}/rankings", entry, parse_uk_regions),
+            refresh=refresh,
+        )
     except Exception as e:
         log_queue.put( (f"❌ ERROR: Failed to fetch UK regions: {e}", "error") )
         return None
-    finally:
-        if temp_driver: temp_driver.quit()
+    if source == "stale":
+        log_queue.put( ("⚠️ Could not refresh the region list. Using the cached copy.", "warning") )
+    elif source != "fetched":
+        log_queue.put( (f"...Loaded regions from cache ({source}).", "info") )
+    return regions
 
 # --- UPDATED: Now takes folder path ---
 def consolidate_backup_files(region_folder_path, region_name):
@@ -303,41 +528,33 @@ def consolidate_backup_files(region_folder_path, region_name):
     backup_files = glob.glob(backup_pattern)
     if not backup_files: return
     log_queue.put( (f"\n 🗂️  Found {len(backup_files)} backup file(s) for {region_name}. Consolidating...", "info") )
-    all_dfs = []
-    if os.path.exists(main_filename):
-        try:
-            all_dfs.append(pd.read_excel(main_filename))
-        except Exception as e:
-            log_queue.put( (f"   ⚠️ Could not read main file '{main_filename}': {e}", "warning") )
-            
-    for backup in backup_files:
-        try:
-            all_dfs.append(pd.read_excel(backup))
-        except Exception as e:
-            log_queue.put( (f"   ⚠️ Could not read backup file '{backup}': {e}", "warning") )
-
-    if not all_dfs:
-        log_queue.put( ("   - No data found in backup files.", "info") )
-        return
-        
-    consolidated_df = pd.concat(all_dfs, ignore_index=True)
-    consolidated_df.drop_duplicates(subset=['Sourcelink'], keep='last', inplace=True)
+    # --- UPDATED: Streamed into a Sourcelink index (last write wins) instead of concatenating DataFrames ---
+    # Timestamped names sort oldest first, so the newest backup wins over older ones and the main file
+    sources = ([main_filename] if os.path.exists(main_filename) else []) + sorted(backup_files)
     try:
-        consolidated_df.to_excel(main_filename, index=False)
-        log_queue.put( (f"   ✅  Successfully merged all data into '{main_filename}'.", "success") )
-        for backup in backup_files:
-            try:
-                os.remove(backup)
-            except Exception as e:
-                log_queue.put( (f"   ⚠️ Could not remove backup file '{backup}': {e}", "warning") )
-        log_queue.put( ("   🗑️  Cleaned up old backup files.", "info") )
+        merged, failed = merge_ranking_workbooks(sources, main_filename)
     except Exception as e:
         log_queue.put( (f"   ❌ ERROR: Could not save consolidated file. Error: {e}", "error") )
+        return
+    for path, e in failed:
+        label = "main file" if path == main_filename else "backup file"
+        log_queue.put( (f"   ⚠️ Could not read {label} '{path}': {e}", "warning") )
+    if not merged:
+        log_queue.put( ("   - No data found in backup files.", "info") )
+        return
+    log_queue.put( (f"   ✅  Successfully merged {merged} rankings into '{main_filename}'.", "success") )
+    for backup in backup_files:
+        if any(path == backup for path, _ in failed): continue # Kept for a manual look
+        try:
+            os.remove(backup)
+        except Exception as e:
+            log_queue.put( (f"   ⚠️ Could not remove backup file '{backup}': {e}", "warning") )
+    log_queue.put( ("   🗑️  Cleaned up old backup files.", "info") )
 
-# --- UPDATED: Now takes folder path ---
-def save_regional_data(region_folder_path, data, region_name, firm_name, current_total):
-    """Saves data for a specific region *inside its folder*, handling permission errors."""
-    if not data: return
+# --- UPDATED: Exports the region's ranking store instead of rewriting an in-memory list ---
+def save_regional_data(region_folder_path, store, region_name, firm_name, current_total):
+    """Exports a region's stored rankings to Excel *inside its folder*, handling permission errors."""
+    if not current_total: return
     
     safe_region_name = region_name.replace(' ', '_')
     # UPDATED: Use os.path.join
@@ -347,13 +564,7 @@ def save_regional_data(region_folder_path, data, region_name, firm_name, current
     log_queue.put( (f"\n💾 Saving {current_total} rankings for {firm_name} to {filename}...", "info") ) 
 
     try:
-        df = pd.DataFrame(data)
-        # UPDATED: Removed 'Logo URL'
-        columns = ["Region", "Ranking Location", "Practice Area", "Ranking Table", "Firm", "Sourcelink"]
-        for col in columns:
-            if col not in df.columns: df[col] = "N/A"
-        df = df[columns]
-        df.to_excel(filename, index=False)
+        store.export_excel(filename)
         log_queue.put( (f"✅ Data for {firm_name} saved successfully.", "success") ) # Updated GUI log
         
     except PermissionError:
@@ -364,14 +575,28 @@ def save_regional_data(region_folder_path, data, region_name, firm_name, current
         fallback_filename = os.path.join(region_folder_path, f"{safe_region_name}_rankings_{timestamp}.xlsx")
         log_queue.put( (f"   ↪️ Saving to a new file: '{fallback_filename}'", "warning") )
         try:
-            df.to_excel(fallback_filename, index=False)
+            store.export_excel(fallback_filename)
         except Exception as e:
             log_queue.put( (f"   ❌ FATAL: Could not save to fallback file. Error: {e}", "error") )
     except Exception as e:
         log_queue.put( (f"   ❌ ERROR: An unexpected error occurred while saving. Error: {e}", "error") )
 
-def initialize_driver():
-    """Creates and returns a new Selenium WebDriver instance."""
+# --- NEW: Append-only ranking store, one SQLite file per region folder ---
+def open_ranking_store(region_folder_path, region_name):
+    """Opens the region's ranking store, importing an Excel file left by an older run if the store is new."""
+    safe_region_name = region_name.replace(' ', '_')
+    store = RankingStore(os.path.join(region_folder_path, f"{safe_region_name}_rankings.sqlite"))
+    excel_filename = os.path.join(region_folder_path, f"{safe_region_name}_rankings.xlsx")
+    if store.count() == 0 and os.path.exists(excel_filename):
+        try:
+            imported = store.import_excel(excel_filename)
+            log_queue.put( (f"   📥 Imported {imported} rankings from '{excel_filename}' into the ranking store.", "info") )
+        except Exception as e:
+            log_queue.put( (f"   ⚠️ Could not import existing Excel file '{excel_filename}': {e}", "warning") )
+    return store
+
+def build_driver_options():
+    """Chrome options for a scraping session, with a freshly picked user-agent."""
     chrome_options = Options()
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
@@ -381,496 +606,762 @@ def initialize_driver():
     chrome_options.add_argument('--media-cache-dir=/tmp/media-cache')
     
     # UPDATED: Pick from the larger list
-    selected_user_agent = random.choice(USER_AGENTS)
-    chrome_options.add_argument(f"user-agent={selected_user_agent}")
+    chrome_options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
+    return apply_to_options(chrome_options, RESOURCE_BLOCKING_PROFILE, site="legal500", report=RESOURCE_BLOCKING_REPORT)
+
+# --- NEW: Shared pool of pre-launched browsers ---
+# One spare browser is kept warm so region starts and scheduled restarts don't wait on Chrome.
+# Sized for every region worker's own browser plus its "browser"-mode fetch browsers, so the
+# fetch browsers checked back in after each firm are reused rather than piling up idle.
+DRIVER_POOL_MAX_SIZE = REGION_WORKERS * (1 + BROWSER_FETCH_WORKERS) + 1
+driver_pool = DriverPool(build_driver_options, spares=1, max_pages=DRIVER_MAX_PAGES, max_size=DRIVER_POOL_MAX_SIZE,
+                         on_launch=lambda driver: apply_to_driver(driver, RESOURCE_BLOCKING_PROFILE, site="legal500"))
+
+# --- NEW: Page weight tally (only filled when RESOURCE_BLOCKING_REPORT is on) ---
+page_weight_report = PageWeightReport()
+
+# --- NEW: One limiter paces every region worker's page loads and HTTP requests ---
+# --- UPDATED: It adapts to the site's responses instead of fixed sleeps and pauses ---
+site_limiter = AdaptiveRateLimiter(SITE_REQUESTS_PER_SECOND, min_rate=SITE_MIN_REQUESTS_PER_SECOND,
+                                   max_rate=SITE_MAX_REQUESTS_PER_SECOND, capacity=REGION_WORKERS)
+cookie_checked = set() # ids of browsers whose first cookie-banner check has been done
+# --- NEW: Replaces the fixed 15-firm restart; browsers are recycled only when they need it ---
+browser_watchdog = BrowserWatchdog(BROWSER_MAX_RSS_MB, BROWSER_MAX_HANDLES, BROWSER_MAX_TABS)
+
+def initialize_driver():
+    """Checks out a (pre-launched) Selenium WebDriver instance from the pool."""
+    driver = driver_pool.checkout()
+    try:
+        selected_user_agent = driver.execute_script("return navigator.userAgent")
+    except WebDriverException:
+        selected_user_agent = "unknown"
     log_queue.put( (f"🕵️  Initializing new browser session (User-Agent: ...{selected_user_agent[-30:]})", "info") )
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=chrome_options)
+    return driver
+
+def release_driver(driver):
+    """Retires a browser session; it is quit in the background so the scraper doesn't wait."""
+    cookie_checked.discard(id(driver))
+    browser_watchdog.forget(driver)
+    driver_pool.discard(driver, background=True)
 
 def handle_cookies_if_present(driver):
-    """Checks for and clicks the 'Accept All' cookie banner if it appears."""
+    """
+    Checks for and clicks the 'Accept All' cookie banner if it appears.
+    A browser's first page waits up to 3s for the banner; later pages only take an instant
+    look, and a banner showing up again there is reported to the throttle.
+    """
     try:
-        cookie_wait = WebDriverWait(driver, 3)
-        accept_button = cookie_wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept All']")))
+        if id(driver) in cookie_checked:
+            buttons = [b for b in driver.find_elements(By.XPATH, "//button[text()='Accept All']") if b.is_displayed()]
+            if not buttons: return
+            accept_button = buttons[0]
+            site_limiter.record_hold("cookie banner")
+        else:
+            cookie_checked.add(id(driver))
+            cookie_wait = WebDriverWait(driver, 3)
+            accept_button = cookie_wait.until(EC.element_to_be_clickable((By.XPATH, "//button[text()='Accept All']")))
         log_queue.put( ("   🍪 Cookie banner appeared. Clicking 'Accept All'.", "info") )
         accept_button.click()
-        time.sleep(random.uniform(1, 2))
+        WebDriverWait(driver, 5).until(EC.invisibility_of_element(accept_button))
     except TimeoutException: pass
 
-def extract_ranking_data(driver, wait, ranking_location, region_name, data_list, csv_writer, firm_name):
+# --- NEW: Feedback for the adaptive throttle ---
+def blocked_page_reason(driver):
+    """Why the current page looks like a block or rate-limit interstitial, or None."""
+    try:
+        title = (driver.title or "").lower()
+    except Exception:
+        return None
+    for marker in BLOCK_PAGE_MARKERS:
+        if marker in title:
+            return f"block page ({marker})"
+    return None
+
+def report_page_load(driver, started, error=None):
+    """Tells the throttle how a page load went: latency on success, pushback on timeouts or block pages."""
+    if isinstance(error, TimeoutException):
+        site_limiter.record_pushback(blocked_page_reason(driver) or "timeout")
+        return
+    reason = blocked_page_reason(driver)
+    if reason:
+        site_limiter.record_pushback(reason)
+    elif error is None:
+        site_limiter.record_success(time.monotonic() - started)
+
+def record_ranking_page(page_html, current_url, ranking_location, data_list, csv_writer, firm_name, requested_url=None):
     """
-    Extracts data from a single ranking page.
-    Appends data to data_list (for excel).
+    Parses one ranking page and records the result.
+    Appends data to data_list (for excel), keyed for resume by the URL it was requested with.
     Writes a detailed log row to csv_writer (for logging).
     """
+    try:
+        parsed = parse_ranking_page(page_html, current_url, ranking_location)
+    except Exception as e:
+        record_ranking_failure(e, current_url, csv_writer, firm_name)
+        return
+    record_parsed_ranking(parsed, current_url, data_list, csv_writer, firm_name, requested_url)
+
+def record_parsed_ranking(parsed, current_url, data_list, csv_writer, firm_name, requested_url=None):
+    """Records an already parsed ranking page: (extracted_data, log_statuses) from parse_ranking_page."""
+    extracted_data, log_statuses = parsed
+    try:
+        if ranking_page_cache is not None:
+            ranking_page_cache.put_ranking([requested_url, current_url], current_url, extracted_data, log_statuses)
+        append_ranking_row(extracted_data, log_statuses, data_list, csv_writer, firm_name, requested_url or current_url)
+    except Exception as e:
+        record_ranking_failure(e, current_url, csv_writer, firm_name)
+
+def append_ranking_row(extracted_data, log_statuses, data_list, csv_writer, firm_name, ranking_url):
+    """Appends one ranking row (for excel) and writes its detailed log row."""
+    extracted_data["Ranking URL"] = ranking_url
+    data_list.append(extracted_data)
     
-    # This dict is for the main excel data
-    extracted_data = {}
-    
-    # This list is for the detailed CSV log row
-    log_statuses = {
-        "Practice Area": "Pending",
-        "Ranking Table": "Pending",
-        "Firm": "Pending",
-        "Sourcelink": "Pending"
-    }
-    
-    current_url = "N/A" # Default in case of immediate crash
-    
+    # Write the detailed log row
+    csv_writer.event(firm_name, "INFO", details=[
+        log_statuses["Practice Area"],
+        log_statuses["Ranking Table"],
+        log_statuses["Firm"],
+        log_statuses["Sourcelink"]
+    ])
+
+# --- NEW: Cross-region reuse of ranking pages ---
+def record_cached_rankings(ranking_urls, ranking_location, data_list, csv_writer, firm_name):
+    """
+    Records the rankings whose pages another region (or a recent run) already parsed,
+    with this region's Ranking Location, without fetching them. Returns the URLs recorded.
+    """
+    if ranking_page_cache is None or not ranking_urls: return set()
+    reused = set()
+    for url, (final_url, page_fields, log_statuses) in ranking_page_cache.get_rankings(ranking_urls).items():
+        log_statuses = dict(log_statuses, Sourcelink="Done (cached)")
+        append_ranking_row(ranking_row(page_fields, final_url, ranking_location), log_statuses, data_list, csv_writer, firm_name, url)
+        reused.add(url)
+    return reused
+
+def record_ranking_failure(e, current_url, csv_writer, firm_name):
+    """Logs a critical failure for a *whole* ranking page."""
+    # Log the short "Message:" part of the error
+    error_msg = str(e).splitlines()[0] if str(e) else type(e).__name__
+    log_queue.put( (f"       - ❌ Error extracting data from tab: {error_msg}", "error") ) # Keep minimal error in GUI
+    csv_writer.event(firm_name, "ERROR", details=[
+        f"Page Failed: {error_msg}",
+        f"Page Failed: {error_msg}",
+        f"Page Failed: {error_msg}",
+        f"Page Failed: {current_url}"
+    ])
+
+def requested_tab_url(current_url, opened_hrefs, positional_href=None):
+    """
+    The card href a ranking tab was opened from: the one its URL matches, else (after a
+    redirect) the href opened in the same position, when tabs and clicks line up.
+    """
+    key = normalize_url(current_url)
+    for href in opened_hrefs:
+        if normalize_url(href) == key:
+            return href
+    return positional_href
+
+def extract_ranking_data(driver, wait, ranking_location, region_name, data_list, csv_writer, firm_name, opened_hrefs=(), positional_href=None):
+    """
+    Extracts data from a single ranking page (the current browser tab).
+    Appends data to data_list (for excel), keyed by the card href the tab was opened
+    from (see requested_tab_url) so resume matches it even if the site redirected.
+    Writes a detailed log row to csv_writer (for logging).
+    """
+    started = time.monotonic()
     try:
         wait.until(EC.visibility_of_element_located((By.TAG_NAME, "header")))
-        page_soup = BeautifulSoup(driver.page_source, 'html.parser')
-        header = page_soup.find('header', class_='flex flex-col gap-4')
-        current_url = driver.current_url
-        log_statuses["Sourcelink"] = "Done"
+        page_html = driver.page_source
+        if RESOURCE_BLOCKING_REPORT:
+            page_weight_report.record(driver)
+    except Exception as e:
+        report_page_load(driver, started, e)
+        record_ranking_failure(e, "N/A", csv_writer, firm_name)
+        return
+    report_page_load(driver, started)
+    current_url = driver.current_url
+    record_ranking_page(page_html, current_url, ranking_location, data_list, csv_writer, firm_name,
+                        requested_url=requested_tab_url(current_url, opened_hrefs, positional_href))
 
-        if not header:
-            raise ValueError("Header container not found on ranking page.")
+def fetch_ranking_pages_async(ranking_urls, ranking_location, data_list, csv_writer, firm_name, failed_urls=None):
+    """
+    Fetches ranking pages over HTTP on the process-wide asyncio core (http_fetcher) and
+    parses each one once with the same parser as the browser path, in the order the URLs
+    were given. If failed_urls is a list, pages that could not be fetched or parsed are
+    added to it (for a browser retry) instead of being logged as failures.
+    """
+    headers = {"User-Agent": random.choice(USER_AGENTS)}
+    for url, page in http_fetcher.fetch_all(ranking_urls, headers=headers):
+        parsed = None
+        if isinstance(page, Exception):
+            error = page
+        elif page.status != 200:
+            error = ValueError(f"HTTP {page.status}")
+        else:
+            error = None
+            try:
+                parsed = parse_ranking_page(page.text, page.final_url, ranking_location)
+            except Exception as e:
+                error = e # e.g. a bot-check page without the ranking header
+        if error is None:
+            record_parsed_ranking(parsed, page.final_url, data_list, csv_writer, firm_name, requested_url=url)
+        elif failed_urls is not None:
+            failed_urls.append(url)
+        else:
+            record_ranking_failure(error, url, csv_writer, firm_name)
 
-        # --- Extract Practice Area ---
-        try:
-            pa_element = header.find('h3', class_='typography-heading-s').find('a')
-            if pa_element:
-                extracted_data["Practice Area"] = pa_element.text.strip()
-                log_statuses["Practice Area"] = "Done"
-            else:
-                extracted_data["Practice Area"] = "N/A"
-                log_statuses["Practice Area"] = "Failed: h3/a element not found"
-        except Exception as e:
-            extracted_data["Practice Area"] = "Failed"
-            log_statuses["Practice Area"] = f"Failed: {str(e).splitlines()[0]}" # Short error
-        
-        # --- Extract Firm Name ---
-        try:
-            firm_element = header.find('h1', class_='typography-heading-l').find('a')
-            if firm_element:
-                extracted_data["Firm"] = firm_element.text.strip()
-                log_statuses["Firm"] = "Done"
-            else:
-                extracted_data["Firm"] = "N/A"
-                log_statuses["Firm"] = "Failed: h1/a element not found"
-        except Exception as e:
-            extracted_data["Firm"] = "Failed"
-            log_statuses["Firm"] = f"Failed: {str(e).splitlines()[0]}" # Short error
+def load_ranking_pages(ranking_urls):
+    """
+    Worker for fetch_ranking_pages_browser: loads each URL in one pooled browser.
+    Returns a list of (url, current_url, page_html or exception).
+    """
+    pages = []
+    driver = None
+    try:
+        driver = driver_pool.checkout()
+        wait = WebDriverWait(driver, 20)
+        for url in ranking_urls:
+            if exit_requested: break
+            site_limiter.acquire()
+            started = time.monotonic()
+            try:
+                driver.get(url)
+                wait.until(EC.visibility_of_element_located((By.TAG_NAME, "header")))
+                pages.append((url, driver.current_url, driver.page_source))
+                if RESOURCE_BLOCKING_REPORT:
+                    page_weight_report.record(driver)
+                report_page_load(driver, started)
+            except Exception as e:
+                report_page_load(driver, started, e)
+                pages.append((url, url, e))
+            driver_pool.count_page(driver)
+    except Exception as e:
+        pages.extend((url, url, e) for url in ranking_urls[len(pages):])
+    finally:
+        driver_pool.checkin(driver)
+    return pages
 
-        # --- Extract Ranking Table / Tier (with NEW fallback) ---
+def fetch_ranking_pages_browser(ranking_urls, ranking_location, data_list, csv_writer, firm_name, workers=BROWSER_FETCH_WORKERS):
+    """
+    Loads ranking pages concurrently in pooled browsers (no tab switching) and records
+    them with the same parser, in the order the URLs were given.
+    """
+    if not ranking_urls: return
+    workers = max(1, min(workers, len(ranking_urls)))
+    shares = [ranking_urls[w::workers] for w in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        loaded = {url: (current_url, page) for share in executor.map(log_queue.in_region(load_ranking_pages), shares) for url, current_url, page in share}
+    for url in ranking_urls:
+        if url not in loaded: continue # Not reached before an exit request
+        current_url, page = loaded[url]
+        if isinstance(page, Exception):
+            record_ranking_failure(page, current_url, csv_writer, firm_name)
+        else:
+            record_ranking_page(page, current_url, ranking_location, data_list, csv_writer, firm_name, requested_url=url)
+
+def firm_page_shows_no_rankings(driver):
+    """True when the firm page positively says the firm has no rankings (see FIRM_NO_RANKINGS_MARKERS)."""
+    try:
+        text = driver.find_element(By.TAG_NAME, "body").text.lower()
+    except Exception:
+        return False
+    return any(marker in text for marker in FIRM_NO_RANKINGS_MARKERS)
+
+def collect_ranking_urls(ranking_cards):
+    """Reads every ranking card's href once, dropping duplicates but keeping page order."""
+    urls = []
+    for card in ranking_cards:
         try:
-            tier_element = header.find('span', class_='md:typography-interface-l-bold')
-            if tier_element:
-                extracted_data["Ranking Table"] = tier_element.text.strip()
-                log_statuses["Ranking Table"] = "Done"
-            else:
-                # NEW: Fallback logic for "Firms to watch"
-                firms_to_watch_img = header.find('img', alt="Firms to watch")
-                if firms_to_watch_img:
-                    extracted_data["Ranking Table"] = "Firms to watch"
-                    log_statuses["Ranking Table"] = "Done (Firms to watch)"
-                else:
-                    extracted_data["Ranking Table"] = "N/A"
-                    log_statuses["Ranking Table"] = "Failed: Tier span and 'Firms to watch' img not found"
-        except Exception as e:
-            extracted_data["Ranking Table"] = "Failed"
-            log_statuses["Ranking Table"] = f"Failed: {str(e).splitlines()[0]}" # Short error
+            href = card.get_attribute("href")
+        except StaleElementReferenceException:
+            continue
+        if href and href not in urls:
+            urls.append(href)
+    return urls
 
-        # --- Add constant and source link ---
-        extracted_data["Region"] = "United Kingdom"
-        extracted_data["Ranking Location"] = ranking_location
-        extracted_data["Sourcelink"] = current_url
-        
-        data_list.append(extracted_data)
-        
-        # Write the detailed log row
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        csv_writer.writerow([
-            firm_name, 
-            timestamp, 
-            "INFO",
-            log_statuses["Practice Area"],
-            log_statuses["Ranking Table"],
-            log_statuses["Firm"],
-            log_statuses["Sourcelink"]
-        ])
+def fetch_ranking_pages(ranking_urls, ranking_location, data_list, csv_writer, firm_name, mode=RANKING_FETCH_MODE):
+    """Fetches a firm's ranking pages with the "http" or "browser" strategy (see RANKING_FETCH_MODE)."""
+    if mode == "http":
+        failed_urls = []
+        fetch_ranking_pages_async(ranking_urls, ranking_location, data_list, csv_writer, firm_name, failed_urls=failed_urls)
+        if failed_urls and not exit_requested:
+            log_queue.put( (f"\t↪️ {len(failed_urls)} ranking page(s) failed over HTTP. Retrying in the browser...", "warning") )
+            write_simple_csv_log(csv_writer, firm_name, "WARN", f"{len(failed_urls)} ranking pages failed over HTTP. Retrying in browser.")
+            fetch_ranking_pages_browser(failed_urls, ranking_location, data_list, csv_writer, firm_name)
+    else:
+        fetch_ranking_pages_browser(ranking_urls, ranking_location, data_list, csv_writer, firm_name)
 
-    except Exception as e:
-        # This is a critical failure for the *whole page*
-        log_queue.put( (f"       - ❌ Error extracting data from tab: {str(e).splitlines()[0]}", "error") ) # Keep minimal error in GUI
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # Log the short "Message:" part of the error
-        error_msg = str(e).splitlines()[0]
-        csv_writer.writerow([
-            firm_name, 
-            timestamp, 
-            "ERROR",
-            f"Page Failed: {error_msg}",
-            f"Page Failed: {error_msg}",
-            f"Page Failed: {error_msg}",
-            f"Page Failed: {current_url}"
-        ])
-
-def run_scraper(selected_regions, regions_data, start_button, root):
-    """Main function to orchestrate the browser navigation and data scraping process."""
-    global scraper_thread_running
-    driver = None
-    all_scraped_data = {}
-    
-    # --- NEW: Define a root directory for all regions ---
-    base_output_dir = "Legal500_Scraped_Data"
-    os.makedirs(base_output_dir, exist_ok=True)
+# --- NEW: Firm directory parsed once per region and kept on disk ---
+def parse_firm_directory(page_html):
+    """Returns [(firm name, absolute firm URL), ...] from a region's directory page, in page order."""
+    soup = make_soup(page_html)
+    firms = []
+    seen_urls = set()
+    for link in soup.select('div[class*="grid"] article > a'):
+        heading = link.find('h4')
+        href = link.get('href')
+        if not heading or not href: continue
+        firm_url = urljoin(BASE_URL, href)
+        if firm_url in seen_urls: continue
+        seen_urls.add(firm_url)
+        firms.append((" ".join(heading.get_text(" ", strip=True).split()), firm_url))
+    return firms
 
+def firm_list_path(region_folder_path, region_name):
+    return os.path.join(region_folder_path, f"{region_name.replace(' ', '_')}_firms.json")
 
+def parse_directory_listing(page_html):
+    """Cache value for a directory page: its ranking location and [[firm name, firm URL], ...]."""
+    soup = make_soup(page_html)
+    heading = soup.find('h1')
+    firms = parse_firm_directory(page_html)
+    if not heading or not firms: return None
+    return {"ranking_location": heading.get_text(strip=True), "firms": [list(firm) for firm in firms]}
+
+def get_firm_list(driver, wait, region_name, regions_data, region_folder_path, refresh=False):
+    """
+    The region's (ranking location, [(firm name, firm URL), ...]).
+    Served from the region's cached firm list while it is fresh; a stale list is
+    revalidated over HTTP, and only otherwise (or with refresh=True) is the directory
+    page loaded in the browser and parsed again.
+    """
+    directory_url = f"{BASE_URL}/{regions_data[region_name]}/directory"
+
+    def fetch():
+        site_limiter.acquire()
+        driver.get(directory_url)
+        driver_pool.count_page(driver)
+        handle_cookies_if_present(driver)
+        ranking_location = wait.until(EC.visibility_of_element_located((By.TAG_NAME, "h1"))).text.strip()
+        wait.until(EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'grid')]//article/a//h4")))
+        firms = parse_firm_directory(driver.page_source)
+        return {"ranking_location": ranking_location, "firms": [list(firm) for firm in firms]}, {}
+
+    path = firm_list_path(region_folder_path, region_name)
+    cache = ListingCache(path, DIRECTORY_CACHE_TTL_HOURS * 3600)
+    listing, source = cache.get(fetch, revalidate=lambda entry: revalidate_listing(directory_url, entry, parse_directory_listing), refresh=refresh)
+    if source == "stale":
+        log_queue.put( (f"   ⚠️ Could not reload the firm directory. Using the cached list from '{path}'.", "warning") )
+    elif source != "fetched":
+        log_queue.put( (f"   📄 Loaded {len(listing['firms'])} firms from '{path}' ({source}).", "info") )
+    return listing["ranking_location"], [tuple(firm) for firm in listing["firms"]]
+
+# --- NEW: One region's complete scrape; runs on a region worker thread ---
+def scrape_region(region_name, regions_data, base_output_dir, refresh_directories=False):
+    """Scrapes every firm of one region with its own browser, folder, CSV log and ranking store."""
+    # --- NEW: Create the dedicated folder for this region ---
+    safe_region_name_folder = re.sub(r'[\\/*?:"<>|]', "", region_name).replace(' ', '_')
+    region_folder_path = os.path.join(base_output_dir, safe_region_name_folder)
+    os.makedirs(region_folder_path, exist_ok=True)
+    log_queue.put( (f"\n📁 Using directory: {region_folder_path}", "info") )
+    
+    csv_writer = None
+    store = None
+    driver = None # Ensure driver is reset
+    
     try:
-        # --- REMOVED driver = initialize_driver() ---
-        # Driver is now initialized *inside* the region loop
+        # --- UPDATED: Pass folder path to CSV writer ---
+        csv_writer = open_csv_writer(region_folder_path, region_name, mode='w')
+        
+        # --- UPDATED: Pass folder path to consolidator ---
+        consolidate_backup_files(region_folder_path, region_name)
+        
+        # --- NEW: Rankings are appended to an on-disk store as they are scraped ---
+        store = open_ranking_store(region_folder_path, region_name)
+        
+        # --- NEW: Initialize driver *per region* ---
+        driver = initialize_driver()
+        wait = WebDriverWait(driver, 20)
+        
+        log_queue.put( ("\n" + "─"*25 + f"\n 📍 Starting Region: {region_name}\n" + "─"*25, "header") )
+        
+        # --- UPDATED: Directory parsed once into (firm name, firm URL) pairs; firms are opened by URL ---
+        ranking_location, firm_list = get_firm_list(driver, wait, region_name, regions_data, region_folder_path, refresh=refresh_directories)
+        num_firms = len(firm_list)
+        log_queue.put( (f"   ✅ Found {num_firms} firms in {ranking_location}.", "success") )
+        
+        # --- UPDATED: Resume from the completion index (firm URLs and ranking URLs), not the last firm name ---
+        completed_firms = store.completed_firms()
+        if store.count() > 0:
+            done_here = sum(1 for _, firm_url in firm_list if firm_url in completed_firms)
+            log_queue.put( (f"\n📄 Found {store.count()} stored rankings for {region_name}. Resuming: {done_here} of {num_firms} firms already complete.", "info") )
 
-        for region_name in selected_regions:
+        for i in range(num_firms):
             if exit_requested:
-                log_queue.put( (f"\n🛑 Halting before starting {region_name}.", "warning") )
+                log_queue.put( ("\n🛑 Halting firm processing loop.", "warning") )
                 break
-            
-            # --- NEW: Create the dedicated folder for this region ---
-            safe_region_name_folder = re.sub(r'[\\/*?:"<>|]', "", region_name).replace(' ', '_')
-            region_folder_path = os.path.join(base_output_dir, safe_region_name_folder)
-            os.makedirs(region_folder_path, exist_ok=True)
-            log_queue.put( (f"\n📁 Using directory: {region_folder_path}", "info") )
-            
-            csv_file = None
-            csv_writer = None
-            driver = None # Ensure driver is reset
-            
-            try:
-                # --- UPDATED: Pass folder path to CSV writer ---
-                csv_file, csv_writer = open_csv_writer(region_folder_path, region_name, mode='w')
-                
-                # --- UPDATED: Pass folder path to consolidator ---
-                consolidate_backup_files(region_folder_path, region_name)
+            if firm_list[i][1] in completed_firms: continue # Every ranking of this firm is already stored
+
+            # --- UPDATED: Restart *browser* (not just driver) within region loop, only when the watchdog says so ---
+            if driver_pool.pages_served(driver) >= DRIVER_MAX_PAGES:
+                restart_reason = f"served {DRIVER_MAX_PAGES} pages"
+            else:
+                restart_reason = browser_watchdog.check(driver)
+            if restart_reason:
+                log_queue.put( ("\n" + "─"*15 + " 🔄 BROWSER RECYCLE " + "─"*15, "header") )
+                log_queue.put( (f"   Browser {restart_reason}. Saving log and restarting browser...", "info") )
+                write_simple_csv_log(csv_writer, "SCRIPT_STATUS", "INFO", f"Recycling browser: {restart_reason}")
                 
-                all_scraped_data[region_name] = []
-                start_index = 0
+                # --- NEW: Save log before restart ---
+                if csv_writer:
+                    # --- ADDED: Log summary before closing ---
+                    total_rankings = store.count()
+                    log_queue.put( (f"   📊 Logging interim total: {total_rankings} rankings for {region_name}.", "info") )
+                    write_simple_csv_log(csv_writer, "SCRIPT_STATUS", "INFO", f"Interim save. Total rankings so far: {total_rankings}")
+                    # --- END ADDED ---
+                    # --- UPDATED: Flushed by the writer thread; the log stays open across the restart ---
+                    csv_writer.flush()
                 
-                # --- UPDATED: Use folder path for filename ---
-                filename = os.path.join(region_folder_path, f"{region_name.replace(' ', '_')}_rankings.xlsx")
+                release_driver(driver)
+                driver = None
+                # --- UPDATED: No fixed 2-minute pause; the adaptive throttle paces the new browser ---
+                log_queue.put( (f"   Browser closed. Current pace: {site_limiter.describe()}.", "info") )
+                if exit_requested: break # Break from inner loop
                 
-                # --- NEW: Initialize driver *per region* ---
                 driver = initialize_driver()
                 wait = WebDriverWait(driver, 20)
                 
-                if os.path.exists(filename):
-                    log_queue.put( (f"\n📄 Found existing file for {region_name}. Attempting to resume.", "info") )
-                    try:
-                        df_existing = pd.read_excel(filename)
-                        all_scraped_data[region_name] = df_existing.to_dict('records')
-                        scraped_firms = df_existing['Firm'].unique()
-                        
-                        driver.get(f"{BASE_URL}/{regions_data[region_name]}/directory")
-                        all_firm_elements = wait.until(EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'grid')]//article/a//h4")))
-                        all_firm_names = [f.text.strip() for f in all_firm_elements]
-                        
-                        if scraped_firms.size > 0:
-                            last_scraped_firm = scraped_firms[-1]
-                            try:
-                                start_index = all_firm_names.index(last_scraped_firm) + 1
-                                log_queue.put( (f"   ↪️ Resuming after '{last_scraped_firm}'. Starting with firm #{start_index + 1}.", "info") )
-                            except ValueError:
-                                log_queue.put( (f"   ⚠️ Could not find last firm. Starting from the beginning.", "warning") )
-                    except Exception as e:
-                        log_queue.put( (f"   ❌ ERROR reading existing Excel file. Starting from scratch. Error: {e}", "error") )
-                        all_scraped_data[region_name] = []
-                        start_index = 0
-
-
-                log_queue.put( ("\n" + "─"*25 + f"\n 📍 Starting Region: {region_name}\n" + "─"*25, "header") )
-                driver.get(f"{BASE_URL}/{regions_data[region_name]}/directory")
-                time.sleep(random.uniform(2, 4))
-                handle_cookies_if_present(driver)
-                ranking_location = wait.until(EC.visibility_of_element_located((By.TAG_NAME, "h1"))).text.strip()
-                
-                # We get num_firms once at the start to set the loop range
-                num_firms = len(wait.until(EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'grid')]//article/a//h4"))))
-                log_queue.put( (f"   ✅ Found {num_firms} firms in {ranking_location}.", "success") )
-
-                session_firm_count = 0
-                for i in range(start_index, num_firms):
-                    if exit_requested:
-                        log_queue.put( ("\n🛑 Halting firm processing loop.", "warning") )
-                        break
-
-                    # --- UPDATED: Restart *browser* (not just driver) within region loop ---
-                    if session_firm_count > 0 and session_firm_count % 15 == 0:
-                        log_queue.put( ("\n" + "─"*15 + " 🔄 SCHEDULED RESTART " + "─"*15, "header") )
-                        log_queue.put( ("   Reached 15 firms. Saving log and restarting browser...", "info") )
-                        
-                        # --- NEW: Save log before restart ---
-                        if csv_file and csv_writer:
-                            # --- ADDED: Log summary before closing ---
-                            total_rankings = len(all_scraped_data[region_name])
-                            log_queue.put( (f"   📊 Logging interim total: {total_rankings} rankings for {region_name}.", "info") )
-                            write_simple_csv_log(csv_writer, "SCRIPT_STATUS", "INFO", f"Interim save. Total rankings so far: {total_rankings}")
-                            # --- END ADDED ---
-                            csv_file.close()
-                        
-                        driver.quit()
-                        log_queue.put( ("   Browser closed. Pausing for 2 minutes...", "info") )
-                        
-                        # Check for exit request during pause
-                        for _ in range(120):
-                            if exit_requested: break
-                            time.sleep(1)
-                        if exit_requested: break # Break from inner loop
-                        
-                        driver = initialize_driver()
-                        wait = WebDriverWait(driver, 20)
-                        
-                        # --- UPDATED: Re-open log in append mode, passing folder path ---
-                        csv_file, csv_writer = open_csv_writer(region_folder_path, region_name, mode='a')
-                        
-                        log_queue.put( (f"   Restarting process for {region_name}...", "info") )
-                        driver.get(f"{BASE_URL}/{regions_data[region_name]}/directory")
-                        time.sleep(random.uniform(2, 4))
-                        handle_cookies_if_present(driver)
-                    
-                    if exit_requested: break # Break from inner loop
+                log_queue.put( (f"   Restarting process for {region_name}...", "info") )
+            
+            if exit_requested: break # Break from inner loop
 
-                    
-                    firm_name_to_process = "N/A"
+            
+            firm_name_to_process, firm_url = firm_list[i]
+            firm_rankings = store.writer(firm_name_to_process) # Each ranking is committed as it is recorded
+            firm_ranking_urls = None # Set once the firm page has been read
+            
+            # --- Log to CSV ---
+            write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"--- Starting scrape for {firm_name_to_process} in {region_name} ---")
+
+            log_queue.put( ("\n" + "="*50 + f"\n⚙️ PROCESSING FIRM {i+1}/{num_firms}: {firm_name_to_process} " + "\n" + "="*50, "header") )
+            log_queue.put( (f"   ⏱️ Pace: {site_limiter.describe()}. Browser: {browser_watchdog.describe(driver)}", "info") )
+            
+            # --- NEW: A firm page already read by another region is not loaded again (tabs mode needs the live cards) ---
+            cached_firm_urls = None
+            if ranking_page_cache is not None and RANKING_FETCH_MODE != "tabs":
+                cached_firm_urls = ranking_page_cache.get_firm(firm_url)
+            
+            try:
+                if cached_firm_urls is None:
+                    # --- UPDATED: Open the firm by URL instead of clicking it in the directory ---
+                    site_limiter.acquire()
+                    firm_load_started = time.monotonic()
+                    driver.get(firm_url)
+                    driver_pool.count_page(driver)
+            except Exception as e:
+                 log_queue.put( (f"   ❌ CRITICAL Error while *opening* {firm_name_to_process}. Skipping firm. Error: {e}", "error") )
+                 error_msg = str(e).splitlines()[0]
+                 write_simple_csv_log(csv_writer, firm_name_to_process, "CRITICAL", f"CRITICAL Error opening {firm_url}. Skipping. Error: {error_msg}")
+                 continue # Skip to the next 'i'; a dead browser fails the watchdog's probe and is replaced
+            
+            try:
+                ranking_cards = []
+                cards_lookup_failed = False # Either card XPath came up empty (the page may not have finished rendering)
+                no_rankings_shown = False # The firm page itself says the firm has no rankings
+                if cached_firm_urls is not None:
+                    firm_ranking_urls = cached_firm_urls
+                    log_queue.put( (f"   ♻️ Firm page read recently (another region or run). Reusing its {len(firm_ranking_urls)} ranking links.", "info") )
+                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Reused {len(firm_ranking_urls)} cached ranking links; firm page not loaded.")
+                else:
+                    # --- UPDATED: More specific wait; no fixed sleep, the throttle reads the load time ---
                     try:
-                        # --- STALE ELEMENT FIX: Re-find elements *inside* the loop ---
-                        wait.until(EC.visibility_of_element_located((By.XPATH, "//div[contains(@class, 'grid')]")))
-                        firms = wait.until(EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'grid')]//article/a//h4")))
-                        
-                        if i >= len(firms):
-                            log_queue.put( (f"   ⚠️ Firm list changed unexpectedly. Skipping to next region.", "warning") )
-                            write_simple_csv_log(csv_writer, "N/A", "WARN", "Firm list changed mid-scrape. Breaking region.")
-                            break # Break from this region's for-loop
-
-                        firm_name_to_process = firms[i].text.strip()
-                        firm_link_element = firms[i].find_element(By.XPATH, "./ancestor::a")
-
-                    except StaleElementReferenceException as e:
-                        log_queue.put( (f"   ❌ StaleElement while *finding* firm {i+1}. Skipping firm.", "error") )
-                        write_simple_csv_log(csv_writer, "N/A", "ERROR", f"StaleElement finding firm {i+1}. Skipping. Error: {e}")
-                        continue # Skip to the next 'i'
+                        wait.until(EC.visibility_of_element_located((By.XPATH, f"//h1[contains(text(), \"{firm_name_to_process}\")] | //h1[contains(text(), 'The Legal 500')]")))
                     except TimeoutException as e:
-                        log_queue.put( (f"   ❌ Timeout while *finding* firm {i+1}. Skipping firm.", "error") )
-                        write_simple_csv_log(csv_writer, "N/A", "ERROR", f"Timeout finding firm {i+1}. Skipping. Error: {e}")
-                        continue # Skip to the next 'i'
-                    
-                    # --- Log to CSV ---
-                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"--- Starting scrape for {firm_name_to_process} in {region_name} ---")
-
-                    log_queue.put( ("\n" + "="*50 + f"\n⚙️ PROCESSING FIRM {i+1}/{num_firms}: {firm_name_to_process} " + "\n" + "="*50, "header") )
-                    
+                        report_page_load(driver, firm_load_started, e)
+                        raise
+                    report_page_load(driver, firm_load_started)
+                    handle_cookies_if_present(driver)
+                
+                    # --- UPDATED: Check if we are on the wrong page ---
                     try:
-                        # --- STALE ELEMENT FAILSAFE: Wrap click in try/except ---
-                        ActionChains(driver).move_to_element(firm_link_element).pause(0.5).click().perform()
-                    except StaleElementReferenceException as e:
-                        log_queue.put( (f"   ❌ StaleElement while *clicking* {firm_name_to_process}. Skipping firm.", "error") )
-                        write_simple_csv_log(csv_writer, firm_name_to_process, "ERROR", f"StaleElement on click. Skipping. Error: {e}")
-                        continue # Skip to the next 'i'
-                    except Exception as e:
-                         log_queue.put( (f"   ❌ CRITICAL Error while *clicking* {firm_name_to_process}. Skipping firm. Error: {e}", "error") )
-                         error_msg = str(e).splitlines()[0]
-                         write_simple_csv_log(csv_writer, firm_name_to_process, "CRITICAL", f"CRITICAL Error on click. Skipping. Error: {error_msg}")
-                         continue # Skip to the next 'i'
-                    
+                        # Try to find the firm header
+                        driver.find_element(By.XPATH, f"//h1[contains(text(), \"{firm_name_to_process}\")]")
+                    except:
+                        # If it fails, we are on a practice area page or similar
+                        log_queue.put( (f"   ⚠️ Opened '{firm_name_to_process}' but landed on a generic page. Skipping.", "warning") )
+                        write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Not a firm page (or timed out). Skipping.")
+                        raise Exception("Not a firm page") # Jump to the outer catch block
+
+                
                     try:
-                        time.sleep(random.uniform(2.5, 4.5))
-                        # --- UPDATED: More specific wait ---
-                        wait.until(EC.visibility_of_element_located((By.XPATH, f"//h1[contains(text(), \"{firm_name_to_process}\")] | //h1[contains(text(), 'The Legal 500')]")))
-                        handle_cookies_if_present(driver)
-                        
-                        # --- UPDATED: Check if we are on the wrong page ---
+                        ranking_cards = driver.find_elements(By.XPATH, "//a[contains(@href, '/rankings/ranking/')]")
+                        if not ranking_cards: raise TimeoutException # Trigger fallback if empty
+                    except TimeoutException:
+                        cards_lookup_failed = True
+                        write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Standard ranking card XPath failed. Trying alternative.")
                         try:
-                            # Try to find the firm header
-                            driver.find_element(By.XPATH, f"//h1[contains(text(), \"{firm_name_to_process}\")]")
-                        except:
-                            # If it fails, we are on a practice area page or similar
-                            log_queue.put( (f"   ⚠️ Clicked '{firm_name_to_process}' but landed on a generic page. Skipping.", "warning") )
-                            write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Not a firm page (or timed out). Skipping.")
-                            raise Exception("Not a firm page") # Jump to the outer catch block
+                            rankings_container = wait.until(EC.presence_of_element_located((By.XPATH, "//section[contains(@class, 'p-0')]")))
+                            ranking_cards = rankings_container.find_elements(By.XPATH, ".//a[contains(@href, '/rankings/ranking/')]")
+                        except TimeoutException:
+                             write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Alternative ranking card XPath also failed.")
+                             ranking_cards = []
+                    if not ranking_cards:
+                        no_rankings_shown = firm_page_shows_no_rankings(driver)
+                
+                    firm_ranking_urls = collect_ranking_urls(ranking_cards)
+                    if ranking_page_cache is not None:
+                        ranking_page_cache.put_firm(firm_url, firm_ranking_urls)
+                
+                num_rankings = len(ranking_cards) or len(firm_ranking_urls)
+                
+                # --- NEW: Rankings already in the store are never fetched again ---
+                stored_urls = store.completed_rankings(firm_ranking_urls)
+                if stored_urls:
+                    log_queue.put( (f" ↪️ {len(stored_urls)} of {len(firm_ranking_urls)} rankings already stored. Skipping them.", "info") )
+                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"{len(stored_urls)} rankings already stored. Skipping them.")
+                
+                # --- NEW: Rankings another region already parsed are recorded from the page cache ---
+                cached_urls = record_cached_rankings([url for url in firm_ranking_urls if url not in stored_urls],
+                                                     ranking_location, firm_rankings, csv_writer, firm_name_to_process)
+                if cached_urls:
+                    log_queue.put( (f" ♻️ {len(cached_urls)} of {len(firm_ranking_urls)} ranking pages reused from the page cache.", "info") )
+                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"{len(cached_urls)} ranking pages reused from the page cache.")
+                    stored_urls |= cached_urls
+                
+                if not num_rankings:
+                    log_queue.put( (" 🔍 Found 0 rankings.", "info") )
+                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "No ranking entries found.")
+                elif RANKING_FETCH_MODE != "tabs":
+                    # --- NEW: Collect hrefs once and fetch the pages concurrently ---
+                    ranking_urls = [url for url in firm_ranking_urls if url not in stored_urls]
+                    log_queue.put( (f" 🔍 Found {num_rankings} rankings. Fetching {len(ranking_urls)} pages ({RANKING_FETCH_MODE})...", "info") )
+                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Found {num_rankings} rankings. Fetching {len(ranking_urls)} pages ({RANKING_FETCH_MODE}).")
+                    fetch_ranking_pages(ranking_urls, ranking_location, firm_rankings, csv_writer, firm_name_to_process)
+                    if not exit_requested:
+                        log_queue.put( ("\t✅ All rankings processed.", "success") )
+                        write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "Finished processing all rankings.")
+                else:
+                    # --- UPDATED: New batching logic ---
+                    if num_rankings > 100:
+                        batch_size = 10
+                    elif num_rankings > 4:
+                        batch_size = 4
+                    else:
+                        batch_size = num_rankings
+                    
+                    log_queue.put( (f" 🔍 Found {num_rankings} rankings. Setting batch size to {batch_size}.", "info") )
+                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Found {num_rankings} rankings. Batch size: {batch_size}.")
+
+                    # --- UPDATED: Check for individual vs batch processing ---
+                    if batch_size == num_rankings:
+                        # This handles the 1-4 ranking case
+                        log_queue.put( (f"\tProcessing {num_rankings} individual rankings...", "info") )
+                        original_window = driver.current_window_handle
+                        write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Processing {num_rankings} individual rankings.")
+                        cards_opened = 0
+                        opened_hrefs = [] # Card hrefs in the order their tabs were opened
+                        for j, card in enumerate(ranking_cards):
+                            if exit_requested: break
+                            # --- REMOVED: log_queue.put(f"\t   - Clicking ranking {j+1}/{num_rankings}...") ---
+                            try:
+                                href = card.get_attribute("href")
+                                if stored_urls and href in stored_urls: continue # Already stored
+                                site_limiter.acquire()
+                                ActionChains(driver).key_down(Keys.CONTROL).click(card).key_up(Keys.CONTROL).perform()
+                                cards_opened += 1
+                                opened_hrefs.append(href)
+                            except Exception as card_e:
+                                error_msg = str(card_e).splitlines()[0]
+                                log_queue.put( (f"   ❌ Error on ranking {j+1}. Skipping. Error: {error_msg}", "error") )
+                                write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"Error on ranking card {j+1}. Skipping. Error: {error_msg}")
+                        if exit_requested: break
 
-                        
-                        ranking_cards = []
                         try:
-                            ranking_cards = driver.find_elements(By.XPATH, "//a[contains(@href, '/rankings/ranking/')]")
-                            if not ranking_cards: raise TimeoutException # Trigger fallback if empty
+                            wait.until(EC.number_of_windows_to_be(cards_opened + 1))
                         except TimeoutException:
-                            write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Standard ranking card XPath failed. Trying alternative.")
-                            try:
-                                rankings_container = wait.until(EC.presence_of_element_located((By.XPATH, "//section[contains(@class, 'p-0')]")))
-                                ranking_cards = rankings_container.find_elements(By.XPATH, ".//a[contains(@href, '/rankings/ranking/')]")
-                            except TimeoutException:
-                                 write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Alternative ranking card XPath also failed.")
-                                 ranking_cards = []
+                            log_queue.put( (f"   ⚠️ Not all {cards_opened} tabs opened. Processing opened tabs.", "warning") )
+                            write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"Not all {cards_opened} ranking tabs opened.")
+
+                        open_windows = [w for w in driver.window_handles if w != original_window]
+                        driver_pool.count_page(driver, len(open_windows))
+                        # Tabs are listed in the order they opened; positions only line up if every click opened one
+                        positional = opened_hrefs if len(open_windows) == len(opened_hrefs) else [None] * len(open_windows)
+                        for window, positional_href in zip(open_windows, positional):
+                            if exit_requested: break
+                            driver.switch_to.window(window)
+                            # --- Pass csv_writer and firm_name ---
+                            extract_ranking_data(driver, wait, ranking_location, region_name, firm_rankings, csv_writer, firm_name_to_process,
+                                                 opened_hrefs, positional_href)
+                            driver.close()
+                        if exit_requested: break
                         
-                        num_rankings = len(ranking_cards)
+                        driver.switch_to.window(original_window)
+                        if not exit_requested:
+                            log_queue.put( ("\t✅ All individual rankings processed.", "success") )
+                            write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "Finished processing individual rankings.")
+                    else:
+                        # This handles the 5-100 (batch 4) and 101+ (batch 10) cases
+                        num_batches = (num_rankings + batch_size - 1) // batch_size
+                        log_queue.put( (f"\tProcessing {num_rankings} rankings in {num_batches} batches of {batch_size}...", "info") )
+                        write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Processing in {num_batches} batches.")
                         
-                        if not ranking_cards:
-                            log_queue.put( (" 🔍 Found 0 rankings.", "info") )
-                            write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "No ranking entries found.")
-                        else:
-                            # --- UPDATED: New batching logic ---
-                            if num_rankings > 100:
-                                batch_size = 10
-                            elif num_rankings > 4:
-                                batch_size = 4
-                            else:
-                                batch_size = num_rankings
+                        for batch_num, batch_start in enumerate(range(0, num_rankings, batch_size)):
+                            if exit_requested: break
+                            log_queue.put( (f"\t- Processing Batch {batch_num + 1}/{num_batches}...", "info") ) # <-- GFX LOG
+                            write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Starting Batch {batch_num + 1}/{num_batches}")
+                            original_window = driver.current_window_handle
                             
-                            log_queue.put( (f" 🔍 Found {num_rankings} rankings. Setting batch size to {batch_size}.", "info") )
-                            write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Found {num_rankings} rankings. Batch size: {batch_size}.")
-
-                            # --- UPDATED: Check for individual vs batch processing ---
-                            if batch_size == num_rankings:
-                                # This handles the 1-4 ranking case
-                                log_queue.put( (f"\tProcessing {num_rankings} individual rankings...", "info") )
-                                original_window = driver.current_window_handle
-                                write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Processing {num_rankings} individual rankings.")
-                                cards_opened = 0
-                                for j, card in enumerate(ranking_cards):
-                                    if exit_requested: break
-                                    # --- REMOVED: log_queue.put(f"\t   - Clicking ranking {j+1}/{num_rankings}...") ---
-                                    try:
-                                        ActionChains(driver).key_down(Keys.CONTROL).click(card).key_up(Keys.CONTROL).perform()
-                                        cards_opened += 1
-                                        time.sleep(random.uniform(0.8, 1.5))
-                                    except Exception as card_e:
-                                        error_msg = str(card_e).splitlines()[0]
-                                        log_queue.put( (f"   ❌ Error on ranking {j+1}. Skipping. Error: {error_msg}", "error") )
-                                        write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"Error on ranking card {j+1}. Skipping. Error: {error_msg}")
+                            # We must re-find the cards every batch
+                            current_cards = driver.find_elements(By.XPATH, "//a[contains(@href, '/rankings/ranking/')]")[batch_start:min(batch_start + batch_size, num_rankings)]
+                            
+                            cards_opened = 0
+                            opened_hrefs = [] # Card hrefs in the order their tabs were opened
+                            for k, card in enumerate(current_cards): # <-- Add counter k
                                 if exit_requested: break
-
+                                # --- REMOVED: log_queue.put(f"\t   - Clicking ranking {batch_start + k + 1}/{num_rankings}...") ---
                                 try:
-                                    wait.until(EC.number_of_windows_to_be(cards_opened + 1))
-                                except TimeoutException:
-                                    log_queue.put( (f"   ⚠️ Not all {cards_opened} tabs opened. Processing opened tabs.", "warning") )
-                                    write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"Not all {cards_opened} ranking tabs opened.")
-
-                                open_windows = [w for w in driver.window_handles if w != original_window]
-                                for window in open_windows:
-                                    if exit_requested: break
-                                    driver.switch_to.window(window)
-                                    # --- Pass csv_writer and firm_name ---
-                                    extract_ranking_data(driver, wait, ranking_location, region_name, all_scraped_data[region_name], csv_writer, firm_name_to_process)
-                                    driver.close()
-                                if exit_requested: break
-                                
-                                driver.switch_to.window(original_window)
-                                if not exit_requested:
-                                    log_queue.put( ("\t✅ All individual rankings processed.", "success") )
-                                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "Finished processing individual rankings.")
-                            else:
-                                # This handles the 5-100 (batch 4) and 101+ (batch 10) cases
-                                num_batches = (num_rankings + batch_size - 1) // batch_size
-                                log_queue.put( (f"\tProcessing {num_rankings} rankings in {num_batches} batches of {batch_size}...", "info") )
-                                write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Processing in {num_batches} batches.")
-                                
-                                for batch_num, batch_start in enumerate(range(0, num_rankings, batch_size)):
-                                    if exit_requested: break
-                                    log_queue.put( (f"\t- Processing Batch {batch_num + 1}/{num_batches}...", "info") ) # <-- GFX LOG
-                                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Starting Batch {batch_num + 1}/{num_batches}")
-                                    original_window = driver.current_window_handle
-                                    
-                                    # We must re-find the cards every batch
-                                    current_cards = driver.find_elements(By.XPATH, "//a[contains(@href, '/rankings/ranking/')]")[batch_start:min(batch_start + batch_size, num_rankings)]
-                                    
-                                    cards_opened = 0
-                                    for k, card in enumerate(current_cards): # <-- Add counter k
-                                        if exit_requested: break
-                                        # --- REMOVED: log_queue.put(f"\t   - Clicking ranking {batch_start + k + 1}/{num_rankings}...") ---
-                                        try:
-                                            ActionChains(driver).key_down(Keys.CONTROL).click(card).key_up(Keys.CONTROL).perform()
-                                            cards_opened += 1
-                                            time.sleep(random.uniform(0.8, 1.5))
-                                        except Exception as card_e:
-                                            error_msg = str(card_e).splitlines()[0]
-                                            log_queue.put( (f"   ❌ Error on ranking in batch. Skipping. Error: {error_msg}", "error") )
-                                            write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"Error on ranking card in batch. Skipping. Error: {error_msg}")
-                                    if exit_requested: break
-
-                                    try:
-                                        wait.until(EC.number_of_windows_to_be(cards_opened + 1))
-                                    except TimeoutException:
-                                        log_queue.put( (f"   ⚠️ Not all {cards_opened} tabs opened. Processing opened tabs.", "warning") )
-                                        write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"Not all {cards_opened} ranking tabs opened in batch.")
-
-                                    open_windows = [w for w in driver.window_handles if w != original_window]
-                                    for window in open_windows:
-                                        if exit_requested: break
-                                        driver.switch_to.window(window)
-                                        # --- Pass csv_writer and firm_name ---
-                                        extract_ranking_data(driver, wait, ranking_location, region_name, all_scraped_data[region_name], csv_writer, firm_name_to_process)
-                                        driver.close()
-                                    if exit_requested: break
-                                    
-                                    driver.switch_to.window(original_window)
-                                    if not exit_requested:
-                                        write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Finished Batch {batch_num + 1}/{num_batches}")
-                                
-                                if not exit_requested:
-                                    log_queue.put( ("\t✅ All batches processed.", "success") )
-                                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "Finished processing all batches.")
+                                    href = card.get_attribute("href")
+                                    if stored_urls and href in stored_urls: continue # Already stored
+                                    site_limiter.acquire()
+                                    ActionChains(driver).key_down(Keys.CONTROL).click(card).key_up(Keys.CONTROL).perform()
+                                    cards_opened += 1
+                                    opened_hrefs.append(href)
+                                except Exception as card_e:
+                                    error_msg = str(card_e).splitlines()[0]
+                                    log_queue.put( (f"   ❌ Error on ranking in batch. Skipping. Error: {error_msg}", "error") )
+                                    write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"Error on ranking card in batch. Skipping. Error: {error_msg}")
+                            if exit_requested: break
 
+                            try:
+                                wait.until(EC.number_of_windows_to_be(cards_opened + 1))
+                            except TimeoutException:
+                                log_queue.put( (f"   ⚠️ Not all {cards_opened} tabs opened. Processing opened tabs.", "warning") )
+                                write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"Not all {cards_opened} ranking tabs opened in batch.")
+
+                            open_windows = [w for w in driver.window_handles if w != original_window]
+                            driver_pool.count_page(driver, len(open_windows))
+                            # Tabs are listed in the order they opened; positions only line up if every click opened one
+                            positional = opened_hrefs if len(open_windows) == len(opened_hrefs) else [None] * len(open_windows)
+                            for window, positional_href in zip(open_windows, positional):
+                                if exit_requested: break
+                                driver.switch_to.window(window)
+                                # --- Pass csv_writer and firm_name ---
+                                extract_ranking_data(driver, wait, ranking_location, region_name, firm_rankings, csv_writer, firm_name_to_process,
+                                                     opened_hrefs, positional_href)
+                                driver.close()
+                            if exit_requested: break
+                            
+                            driver.switch_to.window(original_window)
+                            if not exit_requested:
+                                write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", f"Finished Batch {batch_num + 1}/{num_batches}")
+                        
                         if not exit_requested:
-                            # --- UPDATED: Pass folder path to save function ---
-                            save_regional_data(region_folder_path, all_scraped_data[region_name], region_name, firm_name_to_process, len(all_scraped_data[region_name]))
-                            write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "--- Finished scrape for firm ---")
-                    
-                    # --- UPDATED: Specific TimeoutException handling ---
-                    except TimeoutException:
-                        # This catches the timeout from waiting for the H1 tag
-                        log_queue.put( (f"   ⚠️ Timed out on firm page for '{firm_name_to_process}'. Skipping.", "warning") )
-                        write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Not a firm page (or timed out). Skipping.")
-                    except Exception as e:
-                        # This catches other errors, like the "Not a firm page" I raise manually
-                        if "Not a firm page" in str(e):
-                            pass # Already logged this error
-                        else:
-                            log_queue.put( (f" ❌ ERROR scraping {firm_name_to_process}: {e}", "error") )
-                            error_msg = str(e).splitlines()[0]
-                            write_simple_csv_log(csv_writer, firm_name_to_process, "CRITICAL", f"Critical error during firm scrape: {error_msg}")
-                    
-                    if exit_requested: break
-                    
-                    log_queue.put( (f"   ✅ Finished. Navigating back...", "success") )
-                    try:
-                        driver.back()
-                        time.sleep(random.uniform(3, 5))
-                        handle_cookies_if_present(driver)
-                    except Exception as e:
-                        log_queue.put( (f"   ❌ ERROR navigating back. Restarting browser. Error: {e}", "error") )
-                        error_msg = str(e).splitlines()[0]
-                        write_simple_csv_log(csv_writer, firm_name_to_process, "CRITICAL", f"Error on driver.back(). Restarting. Error: {error_msg}")
-                        # Force a restart
-                        session_firm_count = 14 # Will trigger restart on next loop
-                    
-                    session_firm_count += 1
-                
-                if exit_requested: break
+                            log_queue.put( ("\t✅ All batches processed.", "success") )
+                            write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "Finished processing all batches.")
+
+                if not exit_requested:
+                    # --- NEW: The firm is complete once every ranking it lists is stored ---
+                    missing = len(firm_ranking_urls) - len(store.completed_rankings(firm_ranking_urls))
+                    # No cards (or cards only the fallback XPath found) may just mean a half-rendered page;
+                    # like the page cache, don't trust it. A zero-ranking firm needs the page to say so.
+                    cards_trusted = no_rankings_shown if not firm_ranking_urls else not cards_lookup_failed
+                    if missing:
+                        log_queue.put( (f"   ⚠️ {missing} ranking(s) of {firm_name_to_process} not stored. They will be retried on the next run.", "warning") )
+                        write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", f"{missing} rankings not stored; firm left incomplete for the next run.")
+                    elif not cards_trusted:
+                        write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Ranking cards not found reliably; firm left incomplete for the next run.")
+                    else:
+                        store.mark_firm_done(firm_url, firm_name_to_process, len(firm_ranking_urls))
+                    write_simple_csv_log(csv_writer, firm_name_to_process, "INFO", "--- Finished scrape for firm ---")
             
-            except Exception as region_e:
-                 log_queue.put( (f"\n❌ CRITICAL ERROR IN REGION {region_name}: {region_e}", "error") )
-                 if csv_writer: # Try to log the error to the CSV if possible
-                    error_msg = str(region_e).splitlines()[0]
-                    write_simple_csv_log(csv_writer, "N/A", "CRITICAL", f"Unhandled error processing region: {error_msg}")
-            finally:
-                # --- NEW: This block now runs at the end of *each region* ---
-                
-                # --- NEW: Quit the driver at the end of every region ---
-                if driver:
-                    driver.quit()
-                    log_queue.put( (f"   Browser for {region_name} closed.", "info") )
-                    driver = None # Set to None
-                
-                if csv_file and csv_writer:
-                    # --- ADDED: Log final total for region ---
-                    total_rankings = 0
-                    if region_name in all_scraped_data: # Check if key exists
-                        total_rankings = len(all_scraped_data[region_name])
-                    log_queue.put( (f"   📊 Final total for {region_name}: {total_rankings} rankings.", "info") )
-                    write_simple_csv_log(csv_writer, "SCRIPT_STATUS", "INFO", f"Region finished. Final total rankings: {total_rankings}")
-                    # --- END ADDED ---
-                    csv_file.close()
-                    log_queue.put( (f"💾 Closed log for {region_name}.", "info") )
+            # --- UPDATED: Specific TimeoutException handling ---
+            except TimeoutException:
+                # This catches the timeout from waiting for the H1 tag
+                log_queue.put( (f"   ⚠️ Timed out on firm page for '{firm_name_to_process}'. Skipping.", "warning") )
+                write_simple_csv_log(csv_writer, firm_name_to_process, "WARN", "Not a firm page (or timed out). Skipping.")
+            except Exception as e:
+                # This catches other errors, like the "Not a firm page" I raise manually
+                if "Not a firm page" in str(e):
+                    pass # Already logged this error
+                else:
+                    log_queue.put( (f" ❌ ERROR scraping {firm_name_to_process}: {e}", "error") )
+                    error_msg = str(e).splitlines()[0]
+                    write_simple_csv_log(csv_writer, firm_name_to_process, "CRITICAL", f"Critical error during firm scrape: {error_msg}")
+            
+            if firm_rankings:
+                log_queue.put( (f"\n💾 Stored {len(firm_rankings)} rankings for {firm_name_to_process} ({store.count()} in {region_name}).", "success") )
+            
+            if exit_requested: break
+            
+            log_queue.put( (f"   ✅ Finished {firm_name_to_process}.", "success") )
+        
+    except Exception as region_e:
+         log_queue.put( (f"\n❌ CRITICAL ERROR IN REGION {region_name}: {region_e}", "error") )
+         if csv_writer: # Try to log the error to the CSV if possible
+            error_msg = str(region_e).splitlines()[0]
+            write_simple_csv_log(csv_writer, "N/A", "CRITICAL", f"Unhandled error processing region: {error_msg}")
+    finally:
+        # --- NEW: This block now runs at the end of *each region* ---
+        
+        # --- NEW: Quit the driver at the end of every region ---
+        if driver:
+            release_driver(driver)
+            log_queue.put( (f"   Browser for {region_name} closed.", "info") )
+            driver = None # Set to None
+        
+        if csv_writer:
+            # --- ADDED: Log final total for region ---
+            total_rankings = store.count() if store else 0
+            log_queue.put( (f"   📊 Final total for {region_name}: {total_rankings} rankings.", "info") )
+            if RESOURCE_BLOCKING_REPORT:
+                log_queue.put( (f"   📉 Page weight ({RESOURCE_BLOCKING_PROFILE} blocking): {page_weight_report.summary()}", "info") )
+            write_simple_csv_log(csv_writer, "SCRIPT_STATUS", "INFO", f"Region finished. Final total rankings: {total_rankings}")
+            # --- END ADDED ---
+            # Drains the writer thread and fsyncs the file
+            if csv_writer.close():
+                log_queue.put( (f"💾 Closed log for {region_name}.", "info") )
+            else:
+                reason = csv_writer.error or "writer did not finish in time"
+                log_queue.put( (f"   ❌ Log for {region_name} may be incomplete: {reason}", "error") )
+            if csv_writer.dropped:
+                log_queue.put( (f"   ⚠️ {csv_writer.dropped} log events for {region_name} were dropped.", "warning") )
+        
+        # --- NEW: Export the region's Excel file once, from the store ---
+        if store:
+            save_regional_data(region_folder_path, store, region_name, "Region End", store.count())
+            store.close()
+
+def region_worker(region_name, regions_data, base_output_dir, label_logs, refresh_directories=False):
+    """Region worker entry point; labels this thread's GUI messages with the region when several run at once."""
+    if exit_requested:
+        log_queue.put( (f"\n🛑 Halting before starting {region_name}.", "warning") )
+        return
+    if label_logs:
+        log_queue.context.region = region_name
+    try:
+        scrape_region(region_name, regions_data, base_output_dir, refresh_directories)
+    finally:
+        log_queue.context.region = None
+
+def run_scraper(selected_regions, regions_data, start_button, root, refresh_directories=False):
+    """Main function to orchestrate the browser navigation and data scraping process."""
+    global scraper_thread_running, ranking_page_cache, http_fetcher
+    
+    # --- NEW: Define a root directory for all regions ---
+    base_output_dir = OUTPUT_DIR
+    os.makedirs(base_output_dir, exist_ok=True)
+
+    # --- NEW: One page cache for every region worker, so shared firms are fetched once ---
+    if RANKING_PAGE_CACHE_TTL_HOURS > 0:
+        ranking_page_cache = RankingPageCache(RANKING_PAGE_CACHE_FILE, RANKING_PAGE_CACHE_TTL_HOURS * 3600)
+
+    if RANKING_FETCH_MODE == "http":
+        from common.aio_fetch import BackgroundFetcher
+        http_fetcher = BackgroundFetcher(concurrency=ASYNC_CONCURRENCY, rate_per_host=ASYNC_RATE_PER_HOST,
+                                         headers={"Accept-Language": "en-GB,en;q=0.9"}, shared_limiter=site_limiter)
+
+    try:
+        # --- UPDATED: Regions run on a pool of workers, each with its own browser ---
+        workers = max(1, min(REGION_WORKERS, len(selected_regions)))
+        if workers > 1:
+            log_queue.put( (f"\n🧵 Scraping {len(selected_regions)} regions with {workers} workers (adaptive pace from {SITE_REQUESTS_PER_SECOND:g} requests/s, shared).", "info") )
+            driver_pool.prewarm(workers - 1) # The pool already keeps one spare warm
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(region_worker, region_name, regions_data, base_output_dir, workers > 1, refresh_directories)
+                       for region_name in selected_regions]
+            for future in futures:
+                future.result()
     
     except Exception as e:
         log_queue.put( (f"\n❌ A CRITICAL, UNHANDLED ERROR OCCURRED: {e}", "error") )
@@ -878,21 +1369,15 @@ def run_scraper(selected_regions, regions_data, start_button, root):
         # This is the main shutdown block. It runs on exit, error, or completion.
         log_queue.put( ("\n" + "═"*20 + "\n 🏁 SCRAPING COMPLETE OR HALTED 🏁\n" + "═"*20, "header") )
         
-        # --- CRITICAL: SAVE ALL DATA ---
-        log_queue.put( ("   Saving all collected data one last time...", "info") )
-        # --- UPDATED: Loop, create folders, and save ---
-        for region, data in all_scraped_data.items():
-            if data:
-                # Ensure folder exists for final save
-                safe_name_final = re.sub(r'[\\/*?:"<>|]', "", region).replace(' ', '_')
-                folder_path_final = os.path.join(base_output_dir, safe_name_final)
-                os.makedirs(folder_path_final, exist_ok=True)
-                # Pass folder path to save function
-                save_regional_data(folder_path_final, data, region, "Final Save", len(data))
+        # --- Rankings were committed as each firm finished and exported at each region's end ---
+        if ranking_page_cache is not None:
+            ranking_page_cache.close()
+            ranking_page_cache = None
+        if http_fetcher is not None:
+            http_fetcher.close()
+            http_fetcher = None
         
-        if driver: # If a driver is still open (e.g., from an error), close it.
-            driver.quit()
-        log_queue.put( ("   All files saved. Browser closed.", "info") )
+        log_queue.put( ("   All files saved. Browsers closed.", "info") )
         
         # --- Signal to GUI that thread is done ---
         try:
@@ -909,7 +1394,9 @@ def run_scraper(selected_regions, regions_data, start_button, root):
             
 
 if __name__ == '__main__':
+    driver_pool.start() # Start warming a browser while the user picks regions
     root = tk.Tk()
     app = ScraperApp(root)
     root.mainloop()
+    driver_pool.close()
 
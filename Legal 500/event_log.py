@@ -0,0 +1,180 @@
+import csv
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+# Columns of the per-region event log (CSV header / JSONL keys)
+EVENT_COLUMNS = ["FirmName", "Timestamp", "LogLevel", "Practice Area", "Ranking Table", "Firm", "Sourcelink"]
+
+FORMATS = {"csv": ".csv", "jsonl": ".jsonl"}
+
+class EventLogWriter:
+    """
+    Per-region event log written by its own background thread.
+
+    Scraping threads only put events on a bounded queue; the writer thread formats
+    them (timestamps included) and writes them in batches, flushing at least every
+    `flush_interval` seconds. If the queue is ever full (the disk has stalled) events
+    are dropped and counted rather than blocking the scraper; the count is logged once
+    the writer catches up. close() drains the queue and fsyncs the file.
+
+    fmt="csv" keeps the original 7-column layout; fmt="jsonl" writes one JSON object
+    per line with only the fields an event has, which is smaller and easier to query.
+
+    If the writer thread fails (disk full, file removed), the exception is printed,
+    kept in `error` and passed to on_error(exception) once; later events are counted
+    as dropped, and flush() and close() return False instead of blocking.
+    """
+
+    def __init__(self, path, fmt="csv", mode="w", max_queue=50000, batch_size=500, flush_interval=2.0, on_error=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown event log format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.error = None
+        self.on_error = on_error
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()  # Guards `dropped`
+
+        new_file = mode == "w" or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, mode, newline="", encoding="utf-8")
+        self._csv = csv.writer(self._file) if fmt == "csv" else None
+        if new_file and self._csv is not None:
+            self._csv.writerow(EVENT_COLUMNS)
+
+        self._thread = threading.Thread(target=self._run, name=f"event-log:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    # --- Called from scraping threads ---
+
+    def event(self, firm_name, level, message=None, details=None):
+        """
+        Queues one event: a status `message`, or the four per-field `details`
+        (Practice Area, Ranking Table, Firm, Sourcelink) of a ranking page.
+        """
+        self._put((time.time(), firm_name, level, message, details))
+
+    def flush(self, timeout=10.0):
+        """
+        Blocks until every event queued so far is written and flushed to disk.
+        Returns False if that did not happen within `timeout` or the writer has failed.
+        """
+        done = threading.Event()
+        if not self._put(("flush", done), block=True, timeout=timeout):
+            return False
+        return done.wait(timeout) and self.error is None
+
+    def close(self, timeout=30.0):
+        """
+        Writes everything still queued, fsyncs and closes the file. Returns False if the
+        writer failed or did not finish within `timeout` (its thread is a daemon).
+        """
+        deadline = time.monotonic() + timeout
+        if self._put(None, block=True, timeout=timeout):
+            self._thread.join(max(0.0, deadline - time.monotonic()))
+        return not self._thread.is_alive() and self.error is None
+
+    def _put(self, item, block=False, timeout=None):
+        """Queues an item; returns False (counting it as dropped) if the queue is full or the writer is gone."""
+        if self.error is None:
+            try:
+                self._queue.put(item, block=block, timeout=timeout)
+                return True
+            except queue.Full:
+                pass
+        with self._lock:
+            self.dropped += 1
+        return False
+
+    # --- Writer thread ---
+
+    def _run(self):
+        try:
+            self._write_loop()
+        except Exception as e:
+            self.error = e
+            print(f"Event log writer for {self.path} failed; later events are dropped:", file=sys.stderr)
+            traceback.print_exc()
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            if self.on_error is not None:
+                try:
+                    self.on_error(e)
+                except Exception:
+                    pass
+
+    def _write_loop(self):
+        last_flush = time.monotonic()
+        reported_drops = 0
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = "idle"
+            batch = [] if item == "idle" else [item]
+            while len(batch) < self.batch_size and batch[-1:] != [None]:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            waiters = []
+            rows = []
+            for entry in batch:
+                if entry is None:
+                    continue
+                if entry[0] == "flush":
+                    waiters.append(entry[1])
+                else:
+                    rows.append(self._format(*entry))
+            with self._lock:
+                dropped = self.dropped
+            if dropped > reported_drops:
+                rows.append(self._format(time.time(), "SCRIPT_STATUS", "WARN",
+                                         f"{dropped - reported_drops} log events dropped (log queue full).", None))
+                reported_drops = dropped
+            self._write(rows)
+
+            closing = batch[-1:] == [None]
+            if waiters or closing or time.monotonic() - last_flush >= self.flush_interval:
+                self._file.flush()
+                last_flush = time.monotonic()
+            for waiter in waiters:
+                waiter.set()
+            if closing:
+                os.fsync(self._file.fileno())
+                self._file.close()
+                return
+
+    def _format(self, created, firm_name, level, message, details):
+        timestamp = datetime.datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
+        if self._csv is not None:
+            if details is not None:
+                return [firm_name, timestamp, level, *details]
+            # Sanitize message just in case it contains commas or newlines
+            clean_message = str(message).replace('"', '""').replace('\n', ' ')
+            return [firm_name, timestamp, level, f'"{clean_message}"', "", "", ""]
+        record = {"FirmName": firm_name, "Timestamp": timestamp, "LogLevel": level}
+        if details is not None:
+            record.update(zip(EVENT_COLUMNS[3:], details))
+        else:
+            record["Message"] = str(message)
+        return record
+
+    def _write(self, rows):
+        if not rows:
+            return
+        if self._csv is not None:
+            self._csv.writerows(rows)
+        else:
+            self._file.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+class ListingCache:
+    """
+    One rarely-changing listing (the region map, a region's firm directory) kept in a
+    JSON file with the time it was fetched and any HTTP validators.
+
+    get() returns the cached value while it is younger than `ttl` seconds. Once it is
+    stale, revalidate(entry) is tried first; it may confirm the value is unchanged
+    (e.g. an HTTP 304), hand back a new value, or return None when it cannot tell, in
+    which case fetch() does a full reload. A failed reload falls back to the stale
+    value rather than losing it.
+    """
+
+    UNCHANGED = "unchanged"
+    CHANGED = "changed"
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+
+    def load(self):
+        """The stored entry, or None if there is none or it cannot be read."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entry = json.load(f)
+            if "value" in entry and "fetched_at" in entry:
+                return entry
+        except (OSError, ValueError, TypeError):
+            pass
+        return None
+
+    def store(self, value, validators=None, fetched_at=None):
+        """Writes the entry atomically, so a crash never leaves half a file."""
+        now = time.time()
+        entry = {
+            "fetched_at": fetched_at or now,
+            "validated_at": now,
+            "validators": validators or {},
+            "value": value,
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.path)
+        return entry
+
+    def age(self, entry):
+        return time.time() - entry.get("validated_at", entry["fetched_at"])
+
+    def is_fresh(self, entry):
+        return entry is not None and self.age(entry) < self.ttl
+
+    def get(self, fetch, revalidate=None, refresh=False):
+        """
+        Returns (value, source) where source is "cache", "revalidated", "fetched" or "stale".
+        fetch() returns (value, validators); revalidate(entry) returns
+        (UNCHANGED, validators), (CHANGED, value, validators) or None.
+        refresh=True skips the cache and revalidation entirely.
+        """
+        entry = None if refresh else self.load()
+        if self.is_fresh(entry):
+            return entry["value"], "cache"
+
+        if entry is not None and revalidate is not None:
+            try:
+                outcome = revalidate(entry)
+            except Exception:
+                outcome = None
+            if outcome and outcome[0] == self.UNCHANGED:
+                self.store(entry["value"], outcome[1] or entry.get("validators"), entry["fetched_at"])
+                return entry["value"], "revalidated"
+            if outcome and outcome[0] == self.CHANGED and outcome[1]:
+                self.store(outcome[1], outcome[2])
+                return outcome[1], "fetched"
+
+        try:
+            value, validators = fetch()
+        except Exception:
+            stale = entry if entry is not None else self.load()
+            if stale is None:
+                raise
+            return stale["value"], "stale"
+        if value:
+            self.store(value, validators)
+        return value, "fetched"
@@ -0,0 +1,122 @@
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from page_parsing import PAGE_FIELDS
+
+# Query parameters that never change what a page shows
+IGNORED_QUERY_PARAMS = ("utm_", "gclid", "fbclid")
+
+def normalize_url(url):
+    """Cache key for a URL: lower-cased scheme and host, no fragment, tracking parameters or trailing slash."""
+    parts = urlsplit(url.strip())
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not key.lower().startswith(IGNORED_QUERY_PARAMS))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+class RankingPageCache:
+    """
+    Cross-region cache of what was read from ranking and firm pages, shared by every
+    region worker (and kept between runs) so a firm listed in several regions is only
+    fetched and parsed once per `ttl` seconds.
+
+    Only region-independent content is kept: a ranking page's own fields (see
+    PAGE_FIELDS) and the URL it resolved to, and a firm page's ranking links. The
+    Region and Ranking Location columns are filled in by whichever region reads it.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ranking_pages (
+                url TEXT PRIMARY KEY,
+                final_url TEXT,
+                fields TEXT NOT NULL,
+                statuses TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS firm_pages (
+                url TEXT PRIMARY KEY,
+                ranking_urls TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self.purge()
+
+    def _cutoff(self):
+        return time.time() - self.ttl
+
+    def purge(self):
+        """Drops entries older than the freshness window."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM ranking_pages WHERE fetched_at < ?", (self._cutoff(),))
+            self.conn.execute("DELETE FROM firm_pages WHERE fetched_at < ?", (self._cutoff(),))
+
+    def put_ranking(self, urls, final_url, extracted_data, log_statuses):
+        """
+        Caches a parsed ranking page under each of `urls` (requested and final URL).
+        Pages with any field that failed to parse are not cached, so they are tried again.
+        """
+        if self.ttl <= 0 or not all(status.startswith("Done") for status in log_statuses.values()):
+            return
+        fields = json.dumps({field: extracted_data.get(field, "N/A") for field in PAGE_FIELDS})
+        statuses = json.dumps(log_statuses)
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO ranking_pages (url, final_url, fields, statuses, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                [(key, final_url, fields, statuses, now) for key in {normalize_url(url) for url in urls if url}],
+            )
+
+    def get_rankings(self, urls):
+        """{url: (final_url, page fields, log statuses)} for the fresh entries among `urls`."""
+        keys = {}
+        for url in urls:
+            keys.setdefault(normalize_url(url), []).append(url)
+        found = {}
+        key_list = list(keys)
+        with self._lock:
+            for start in range(0, len(key_list), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = key_list[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT url, final_url, fields, statuses FROM ranking_pages WHERE url IN ({marks}) AND fetched_at >= ?",
+                    chunk + [self._cutoff()],
+                ).fetchall()
+                for key, final_url, fields, statuses in rows:
+                    for url in keys[key]:
+                        found[url] = (final_url, json.loads(fields), json.loads(statuses))
+        return found
+
+    def put_firm(self, firm_url, ranking_urls):
+        """Caches a firm page's ranking links; an empty list may be a page that failed to render, so it is skipped."""
+        if self.ttl <= 0 or not ranking_urls:
+            return
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO firm_pages (url, ranking_urls, fetched_at) VALUES (?, ?, ?)",
+                (normalize_url(firm_url), json.dumps(list(ranking_urls)), time.time()),
+            )
+
+    def get_firm(self, firm_url):
+        """The firm page's cached ranking links, or None if there is no fresh entry."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT ranking_urls FROM firm_pages WHERE url = ? AND fetched_at >= ?",
+                (normalize_url(firm_url), self._cutoff()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,207 @@
+"""
+HTML parsing for Legal 500 pages, behind a pluggable parser backend.
+
+Every backend is a BeautifulSoup tree builder, so the field lookups (and therefore
+the extracted values and log statuses) are identical whichever one runs; the
+C-backed lxml builder is preferred when installed, html.parser otherwise. Ranking
+pages are also cut down to their <header> block before parsing, so the parser
+never walks the rest of the page.
+
+Run `python page_parsing.py saved_page.html [...]` for a micro-benchmark.
+"""
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+# Preferred first; the first importable backend becomes the default
+BACKENDS = ["lxml", "html.parser"]
+
+def available_backends():
+    backends = []
+    for backend in BACKENDS:
+        if backend == "lxml":
+            try:
+                import lxml  # noqa: F401
+            except ImportError:
+                continue
+        backends.append(backend)
+    return backends
+
+DEFAULT_BACKEND = available_backends()[0]
+
+def make_soup(html, backend=None):
+    return BeautifulSoup(html, backend or DEFAULT_BACKEND)
+
+# --- Subtree slicing ---
+
+RANKING_HEADER_CLASS = "flex flex-col gap-4"
+RANKING_HEADER_OPEN = re.compile(r"""<header\b[^>]*\bclass\s*=\s*(["'])flex flex-col gap-4\1[^>]*>""", re.IGNORECASE)
+HEADER_TAG = re.compile(r"<(/?)header\b[^>]*>", re.IGNORECASE)
+
+def ranking_header_html(page_html):
+    """
+    The ranking header element's own HTML (up to its matching </header>), or None if
+    it cannot be located textually; callers then parse the whole page instead.
+    """
+    match = RANKING_HEADER_OPEN.search(page_html)
+    if not match:
+        return None
+    depth = 0
+    for tag in HEADER_TAG.finditer(page_html, match.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return page_html[match.start():tag.end()]
+    return None
+
+def find_ranking_header(page_html, backend=None):
+    """The ranking page's header element, parsed from the smallest HTML that contains it."""
+    header_html = ranking_header_html(page_html)
+    soup = make_soup(header_html if header_html is not None else page_html, backend)
+    return soup.find('header', class_=RANKING_HEADER_CLASS)
+
+# --- Ranking pages ---
+
+def parse_ranking_page(page_html, current_url, ranking_location, backend=None):
+    """
+    Parses the header of a single ranking page.
+    Returns (extracted_data, log_statuses): the Excel row and the per-field CSV log statuses.
+    Raises ValueError if the header container is missing.
+    """
+    header = find_ranking_header(page_html, backend)
+
+    if not header:
+        raise ValueError("Header container not found on ranking page.")
+
+    return ranking_header_fields(header, current_url, ranking_location)
+
+def ranking_header_fields(header, current_url, ranking_location):
+    """(extracted_data, log_statuses) read from a parsed ranking header element."""
+
+    # This dict is for the main excel data
+    extracted_data = {}
+
+    # This list is for the detailed CSV log row
+    log_statuses = {
+        "Practice Area": "Pending",
+        "Ranking Table": "Pending",
+        "Firm": "Pending",
+        "Sourcelink": "Done"
+    }
+
+    # --- Extract Practice Area ---
+    try:
+        pa_element = header.find('h3', class_='typography-heading-s').find('a')
+        if pa_element:
+            extracted_data["Practice Area"] = pa_element.text.strip()
+            log_statuses["Practice Area"] = "Done"
+        else:
+            extracted_data["Practice Area"] = "N/A"
+            log_statuses["Practice Area"] = "Failed: h3/a element not found"
+    except Exception as e:
+        extracted_data["Practice Area"] = "Failed"
+        log_statuses["Practice Area"] = f"Failed: {str(e).splitlines()[0]}" # Short error
+
+    # --- Extract Firm Name ---
+    try:
+        firm_element = header.find('h1', class_='typography-heading-l').find('a')
+        if firm_element:
+            extracted_data["Firm"] = firm_element.text.strip()
+            log_statuses["Firm"] = "Done"
+        else:
+            extracted_data["Firm"] = "N/A"
+            log_statuses["Firm"] = "Failed: h1/a element not found"
+    except Exception as e:
+        extracted_data["Firm"] = "Failed"
+        log_statuses["Firm"] = f"Failed: {str(e).splitlines()[0]}" # Short error
+
+    # --- Extract Ranking Table / Tier (with NEW fallback) ---
+    try:
+        tier_element = header.find('span', class_='md:typography-interface-l-bold')
+        if tier_element:
+            extracted_data["Ranking Table"] = tier_element.text.strip()
+            log_statuses["Ranking Table"] = "Done"
+        else:
+            # NEW: Fallback logic for "Firms to watch"
+            firms_to_watch_img = header.find('img', alt="Firms to watch")
+            if firms_to_watch_img:
+                extracted_data["Ranking Table"] = "Firms to watch"
+                log_statuses["Ranking Table"] = "Done (Firms to watch)"
+            else:
+                extracted_data["Ranking Table"] = "N/A"
+                log_statuses["Ranking Table"] = "Failed: Tier span and 'Firms to watch' img not found"
+    except Exception as e:
+        extracted_data["Ranking Table"] = "Failed"
+        log_statuses["Ranking Table"] = f"Failed: {str(e).splitlines()[0]}" # Short error
+
+    return ranking_row(extracted_data, current_url, ranking_location), log_statuses
+
+# Fields read from the page itself; the rest of a row depends on where it was reached from
+PAGE_FIELDS = ["Practice Area", "Ranking Table", "Firm"]
+
+def ranking_row(page_fields, current_url, ranking_location):
+    """A full ranking row: the page's own fields plus the region context and source link."""
+    row = {field: page_fields.get(field, "N/A") for field in PAGE_FIELDS}
+
+    # --- Add constant and source link ---
+    row["Region"] = "United Kingdom"
+    row["Ranking Location"] = ranking_location
+    row["Sourcelink"] = current_url
+    return row
+
+# --- Region map ---
+
+SOLICITORS_LIST = re.compile(r"<h4\b[^>]*>\s*Solicitors\s*</h4>.*?</ul>", re.IGNORECASE | re.DOTALL)
+
+def parse_uk_regions(page_html, backend=None):
+    """{region name: href} from the Solicitors list of the rankings page (or of the list's own HTML)."""
+    match = SOLICITORS_LIST.search(page_html)
+    soup = make_soup(match.group(0) if match else page_html, backend)
+    heading = soup.find('h4', string=lambda text: text and text.strip() == 'Solicitors')
+    region_list_ul = heading.find_next_sibling('ul') if heading else soup.find('ul')
+    if not region_list_ul: return {}
+    return {link.text.strip(): link.get('href') for link in region_list_ul.find_all('a')}
+
+# --- Micro-benchmark ---
+
+def baseline_ranking_header(page_html):
+    """The original approach: html.parser over the full page."""
+    return BeautifulSoup(page_html, 'html.parser').find('header', class_=RANKING_HEADER_CLASS)
+
+def benchmark(paths, repeat=20):
+    """Times the original full-page parse against each backend; checks they extract the same fields."""
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+
+    def timed(parse_header):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for page in pages:
+                parse_header(page)
+        return (time.perf_counter() - started) / (repeat * len(pages))
+
+    def fields(header):
+        return ranking_header_fields(header, "url", "location") if header else None
+
+    results = [("html.parser, full page (original)", timed(baseline_ranking_header))]
+    for backend in available_backends():
+        for page in pages:
+            if fields(find_ranking_header(page, backend)) != fields(baseline_ranking_header(page)):
+                raise AssertionError(f"{backend} extracted different fields than the original parser")
+        results.append((f"{backend}, header subtree", timed(lambda page, b=backend: find_ranking_header(page, b))))
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark ranking-page header parsing on saved pages")
+    parser.add_argument("pages", nargs="+", help="Saved ranking page HTML files")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = benchmark(args.pages, args.repeat)
+    baseline = results[0][1]
+    for label, seconds in results:
+        print(f"{label:<36} {seconds * 1000:8.2f} ms/page  ({baseline / seconds:5.1f}x)")
@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import datetime
+
+import pandas as pd
+
+# Column order of the exported Excel file
+RANKING_COLUMNS = ["Region", "Ranking Location", "Practice Area", "Ranking Table", "Firm", "Sourcelink"]
+
+class RankingStore:
+    """
+    Append-only SQLite store for one region's rankings.
+    Rows are written in fsync'd transactions as they are scraped; the Excel file is
+    only generated from here (export_excel) instead of being rewritten per firm.
+
+    It doubles as the region's completion index: every ranking is keyed by the URL
+    it was requested with (ranking_url) and its Sourcelink, and a firm's URL is
+    recorded once all of its rankings are stored, so a resumed run skips exactly
+    what is already done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")  # fsync on every commit
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS rankings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                region TEXT,
+                ranking_location TEXT,
+                practice_area TEXT,
+                ranking_table TEXT,
+                firm TEXT,
+                sourcelink TEXT,
+                scraped_firm TEXT,
+                scraped_at TEXT
+            )
+        """)
+        # Stores created before the completion index lack the requested-URL column
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(rankings)")]
+        if "ranking_url" not in columns:
+            self.conn.execute("ALTER TABLE rankings ADD COLUMN ranking_url TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS rankings_sourcelink ON rankings (sourcelink)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS rankings_ranking_url ON rankings (ranking_url)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS firms (
+                firm_url TEXT PRIMARY KEY,
+                firm_name TEXT,
+                rankings INTEGER NOT NULL DEFAULT 0,
+                completed_at TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def append(self, rows, scraped_firm=None):
+        """
+        Appends new ranking dicts in a single committed transaction; returns the number written.
+        A row's optional "Ranking URL" key is the URL the page was requested with.
+        """
+        if not rows:
+            return 0
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO rankings (region, ranking_location, practice_area, ranking_table, firm, sourcelink, scraped_firm, scraped_at, ranking_url) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [tuple(row.get(col, "N/A") for col in RANKING_COLUMNS) + (scraped_firm, timestamp, row.get("Ranking URL"))
+                 for row in rows],
+            )
+        return len(rows)
+
+    def writer(self, scraped_firm):
+        """A list-like sink for one firm: every append() is committed straight away."""
+        return FirmRankingWriter(self, scraped_firm)
+
+    def completed_rankings(self, urls):
+        """The subset of `urls` already stored, matched on the requested URL or the Sourcelink."""
+        urls = list(urls)
+        done = set()
+        for start in range(0, len(urls), 500):  # Stay under SQLite's bound-parameter limit
+            chunk = urls[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            done.update(row[0] for row in self.conn.execute(
+                f"SELECT ranking_url FROM rankings WHERE ranking_url IN ({marks}) "
+                f"UNION SELECT sourcelink FROM rankings WHERE sourcelink IN ({marks})", chunk + chunk))
+        return done
+
+    def mark_firm_done(self, firm_url, firm_name, rankings):
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO firms (firm_url, firm_name, rankings, completed_at) VALUES (?, ?, ?, ?)",
+                (firm_url, firm_name, rankings, timestamp),
+            )
+
+    def completed_firms(self):
+        """URLs of firms whose rankings are all stored."""
+        return {row[0] for row in self.conn.execute("SELECT firm_url FROM firms")}
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM rankings").fetchone()[0]
+
+    def iter_rows(self, batch_size=5000):
+        """Yields stored rankings as tuples in RANKING_COLUMNS order, oldest first."""
+        cursor = self.conn.execute(
+            "SELECT region, ranking_location, practice_area, ranking_table, firm, sourcelink FROM rankings ORDER BY id"
+        )
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            yield from batch
+
+    def import_excel(self, filename):
+        """One-off import of an Excel file written before the store existed; returns rows imported."""
+        df = pd.read_excel(filename).reindex(columns=RANKING_COLUMNS).astype(object).fillna("N/A")
+        return self.append(df.to_dict('records'))
+
+    def export_excel(self, filename):
+        """Streams every stored ranking into an .xlsx file without loading them all into memory."""
+        import openpyxl  # Already required by pandas' Excel support
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(RANKING_COLUMNS)
+        for row in self.iter_rows():
+            sheet.append(list(row))
+        workbook.save(filename)
+
+    def close(self):
+        self.conn.close()
+
+class FirmRankingWriter:
+    """Stands in for a firm's list of ranking rows; rows go to the store as they arrive."""
+
+    def __init__(self, store, scraped_firm):
+        self.store = store
+        self.scraped_firm = scraped_firm
+        self.written = 0
+
+    def append(self, row):
+        self.written += self.store.append([row], scraped_firm=self.scraped_firm)
+
+    def __len__(self):
+        return self.written
+
+def merge_ranking_workbooks(paths, output_path, key="Sourcelink"):
+    """
+    Merges ranking workbooks into one, keeping the last row seen for each `key` value
+    (later files win). Each file is streamed row by row into a key -> row index, so
+    memory holds one copy of the merged rows rather than every file at once.
+    Returns (rows written, [(path, error) for files that could not be read]); nothing is
+    written if no rows could be read.
+    """
+    import openpyxl  # Already required by pandas' Excel support
+
+    columns = list(RANKING_COLUMNS)
+    index = {}
+    failed = []
+    for path in paths:
+        try:
+            workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        except Exception as e:
+            failed.append((path, e))
+            continue
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(name) if name is not None else None for name in next(rows, ())]
+            for name in header:
+                if name is not None and name not in columns:
+                    columns.append(name)
+            for values in rows:
+                if not any(value is not None for value in values):
+                    continue  # Blank row
+                row = {name: value for name, value in zip(header, values) if name is not None}
+                row_key = row.get(key)
+                index.pop(row_key, None)  # Re-inserted so the row sits where its last copy was
+                index[row_key] = row
+        except Exception as e:
+            failed.append((path, e))
+        finally:
+            workbook.close()
+    if not index:
+        return 0, failed  # Nothing readable; leave the existing output alone
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(columns)
+    for row in index.values():
+        sheet.append([row.get(name) for name in columns])
+    temp_path = output_path + ".tmp.xlsx"
+    workbook.save(temp_path)
+    os.replace(temp_path, output_path)
+    return len(index), failed
@@ -1,21 +1,46 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import time
 import random
+import queue
+import threading
 from collections import deque
+import argparse
+import os
+import sys
+from urllib.parse import urlsplit
 
-def setup_driver():
-    """Setup Selenium WebDriver with optimized Chrome settings for headless mode."""
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.driver_pool import DriverPool, launch_driver
+from common.browser_contexts import ContextPool
+from common.rate_limit import AdaptiveRateLimiter
+from common.resource_blocking import PROFILES as BLOCKING_PROFILES, PageWeightReport, apply_to_options, apply_to_driver
+from grid_parsing import GRID_CELL_SELECTORS, build_property_record
+from network_capture import GridResponseCapture, enable_performance_log
+from ledger import ParcelLedger, STATUS_DONE, STATUS_EMPTY, STATUS_FAILED
+from parcel_input import iter_parcel_numbers, parse_shard
+from search_planner import ParcelGroup, match_group, plan_searches, split_group
+
+SEARCH_URL = "https://marshall.countygovservices.com/Property/Property/Search"
+
+# Request-blocking profile applied to every browser (see common/resource_blocking.py)
+BLOCKING_PROFILE = "light"
+
+def build_chrome_options(blocking=BLOCKING_PROFILE, report=False, page_load_strategy=None, capture_network=False):
+    """Optimized Chrome settings for headless mode, with the request-blocking profile applied."""
     chrome_options = Options()
+    if capture_network:
+        enable_performance_log(chrome_options)
+    if page_load_strategy:
+        chrome_options.page_load_strategy = page_load_strategy
     chrome_options.add_argument("--headless")  # Run Chrome in headless mode
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--no-sandbox")
@@ -24,8 +49,13 @@ def setup_driver():
     chrome_options.add_argument("--disable-notifications")
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_argument("--disable-infobars")
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=chrome_options)
+    return apply_to_options(chrome_options, blocking, site="marshall", report=report)
+
+def setup_driver(blocking=BLOCKING_PROFILE, report=False):
+    """Setup Selenium WebDriver with optimized Chrome settings for headless mode."""
+    driver = launch_driver(build_chrome_options(blocking, report))
+    apply_to_driver(driver, blocking, site="marshall")
+    return driver
 
 def human_like_delay(min=0.05, max=0.15):
     """Introduce minimal delay to maintain performance while simulating human behavior."""
@@ -42,18 +72,35 @@ def human_like_click(element, driver):
     actions.release()
     actions.perform()
 
-def select_parcel_option(driver):
-    """Ensure Parcel is selected efficiently with human-like interaction."""
+def select_parcel_option(driver, profile="human"):
+    """Ensure Parcel is selected efficiently with human-like (or, in the fast profile, direct) interaction."""
     try:
         parcel_radio = WebDriverWait(driver, 5).until(
             EC.element_to_be_clickable((By.CSS_SELECTOR, "input[value='parcel'][name='PropertySearchType']"))
         )
-        human_like_click(parcel_radio, driver)
+        if profile == "fast":
+            parcel_radio.click()
+        else:
+            human_like_click(parcel_radio, driver)
         print("✓ Parcel option selected successfully")
     except Exception as e:
         print(f"Error selecting parcel option: {str(e)}")
 
-def extract_property_data(driver):
+# Reads every grid row in one WebDriver call. Hidden cells read as "" to match Selenium's .text
+GRID_ROWS_SCRIPT = """
+const selectors = arguments[0];
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+return Array.from(document.querySelectorAll('#gridResults tbody tr')).map(row => {
+    const cells = {};
+    for (const [name, selector] of Object.entries(selectors)) {
+        const el = row.querySelector(selector);
+        cells[name] = el ? (visible(el) ? el.innerText : '') : null;
+    }
+    return cells;
+});
+"""
+
+def extract_property_data_by_element(driver):
     """Extract property details while preserving correct column order."""
     try:
         WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, "#gridResults tbody tr")))
@@ -86,93 +133,678 @@ def extract_property_data(driver):
             except Exception as e:
                 print(f"Error extracting row: {str(e)}")
 
-        return list(properties) if properties else None  # Convert deque to list for Pandas
+        return list(properties)  # Convert deque to list for Pandas; [] means the grid had no rows
+    except Exception as e:
+        print(f"Error extracting property data: {str(e)}")
+        return None
+
+def extract_property_data_by_script(driver):
+    """Extract the whole results grid with a single script call instead of one round trip per cell."""
+    try:
+        WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, "#gridResults tbody tr")))
+        raw_rows = driver.execute_script(GRID_ROWS_SCRIPT, GRID_CELL_SELECTORS) or []
+
+        properties = deque()
+        for cells in raw_rows:
+            try:
+                properties.append(build_property_record(cells))
+            except Exception as e:
+                print(f"Error extracting row: {str(e)}")
+
+        return list(properties)
     except Exception as e:
         print(f"Error extracting property data: {str(e)}")
         return None
 
-def search_parcel(driver, parcel_value):
-    """Optimized parcel search with efficient input handling."""
+EXTRACTION_MODES = {
+    "script": extract_property_data_by_script,
+    "element": extract_property_data_by_element,
+    # Records come from the captured search response (see search_parcel); the DOM read is its fallback
+    "network": extract_property_data_by_script,
+}
+
+def extract_property_data(driver, extraction="script"):
+    """Extract property details from the rendered grid with the chosen extraction mode (see EXTRACTION_MODES)."""
+    return EXTRACTION_MODES[extraction](driver)
+
+INTERACTION_PROFILES = ("human", "fast")
+
+# A range search matching more records than this is narrowed instead of paged through
+GROUP_MAX_RESULTS = 200
+
+# Consecutive range searches that match none of their parcels before a worker stops trying them
+GROUP_MISS_LIMIT = 3
+
+# Seconds the fast profile waits for the grid before giving up on a parcel
+GRID_REFRESH_TIMEOUT = 15
+
+# Network activity must be quiet this long (ms) before an unchanged grid counts as refreshed
+NETWORK_IDLE_MS = 300
+
+# Counts in-flight/finished XHR and fetch calls so the fast profile can wait for network idle
+NETWORK_HOOK_SCRIPT = """
+if (!window.__scraperNet) {
+    const net = window.__scraperNet = {pending: 0, done: 0, last: performance.now()};
+    const start = () => { net.pending++; net.last = performance.now(); };
+    const finish = () => { net.pending = Math.max(0, net.pending - 1); net.done++; net.last = performance.now(); };
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        start();
+        this.addEventListener('loadend', finish, {once: true});
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        const fetch = window.fetch;
+        window.fetch = function () {
+            start();
+            return fetch.apply(this, arguments).finally(finish);
+        };
+    }
+}
+"""
+
+# Snapshot used to decide whether the results grid has refreshed
+GRID_STATE_SCRIPT = """
+const body = document.querySelector('#gridResults tbody');
+const loading = document.querySelector('#load_gridResults');
+const net = window.__scraperNet;
+return {
+    signature: body ? body.innerText : null,
+    busy: !!(loading && loading.offsetParent !== null) || document.readyState !== 'complete',
+    net: net ? {pending: net.pending, done: net.done, idle_ms: performance.now() - net.last} : null
+};
+"""
+
+def grid_refreshed(before):
+    """Wait condition: the grid changed, or the page was replaced, or the search's requests settled."""
+    def condition(driver):
+        state = driver.execute_script(GRID_STATE_SCRIPT)
+        if state["busy"]:
+            return False
+        if state["net"] is None:
+            # Our hook is gone, so the search navigated to a new page
+            return state["signature"] is not None
+        if state["signature"] is not None and state["signature"] != before["signature"]:
+            return True
+        net, net_before = state["net"], before["net"]
+        return net["done"] > net_before["done"] and net["pending"] == 0 and net["idle_ms"] >= NETWORK_IDLE_MS
+    return condition
+
+def search_parcel(driver, parcel_value, extraction="script", profile="human"):
+    """
+    Optimized parcel search with efficient input handling.
+    profile='human' types key by key with human-like pauses; profile='fast' enters the value
+    in one call and waits for the grid to refresh instead of sleeping.
+    extraction='network' takes the rows from the grid's network response as soon as it has
+    loaded, instead of waiting for and reading the rendered grid.
+    """
+    capture = GridResponseCapture(driver, [urlsplit(SEARCH_URL).path]) if extraction == "network" else None
     try:
         parcel_input = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#pt-search-editor-1")))
-        parcel_input.click()
-        parcel_input.send_keys(Keys.CONTROL + "a")
-        parcel_input.send_keys(Keys.BACKSPACE)
-        human_like_delay()
 
-        for char in parcel_value:
-            parcel_input.send_keys(char)
+        if profile == "fast":
+            driver.execute_script(NETWORK_HOOK_SCRIPT)
+            parcel_input.clear()
+            parcel_input.send_keys(parcel_value)
+            search_button = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#pt-search-button")))
+            before = driver.execute_script(GRID_STATE_SCRIPT)
+            if capture:
+                capture.arm()
+            search_button.click()
+            if not capture:
+                WebDriverWait(driver, GRID_REFRESH_TIMEOUT, poll_frequency=0.1).until(grid_refreshed(before))
+        else:
+            parcel_input.click()
+            parcel_input.send_keys(Keys.CONTROL + "a")
+            parcel_input.send_keys(Keys.BACKSPACE)
             human_like_delay()
 
-        search_button = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#pt-search-button")))
-        human_like_click(search_button, driver)
-        time.sleep(2)
+            for char in parcel_value:
+                parcel_input.send_keys(char)
+                human_like_delay()
+
+            search_button = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#pt-search-button")))
+            if capture:
+                capture.arm()
+            human_like_click(search_button, driver)
+            if not capture:
+                time.sleep(2)
 
-        return extract_property_data(driver)
+        if capture:
+            properties = capture.wait(GRID_REFRESH_TIMEOUT)
+            if properties is not None:
+                return properties
+            print(f"↪️ No grid response captured for {parcel_value}; reading the rendered grid")
+
+        return extract_property_data(driver, extraction)
     except Exception as e:
         print(f"Error searching parcel {parcel_value}: {str(e)}")
         return None
 
-def read_parcel_list(csv_path):
-    """Optimized CSV reading using Pandas for faster processing."""
-    print(f"\nReading parcel numbers from {csv_path}...")
+# jqGrid's paging state for the results grid; jqgrid is false when the grid is plain markup
+GRID_PAGER_SCRIPT = """
+const $ = window.jQuery;
+if (!$ || !$.fn || !$.fn.jqGrid || !$('#gridResults').length) return {jqgrid: false};
+const grid = $('#gridResults');
+return {
+    jqgrid: true,
+    page: Number(grid.jqGrid('getGridParam', 'page')) || 1,
+    lastpage: Number(grid.jqGrid('getGridParam', 'lastpage')) || 1,
+    records: Number(grid.jqGrid('getGridParam', 'records')) || 0
+};
+"""
+
+GRID_GOTO_PAGE_SCRIPT = "window.jQuery('#gridResults').jqGrid('setGridParam', {page: arguments[0]}).trigger('reloadGrid');"
+
+def pager_caught_up(min_records):
+    """Wait condition: the pager state, once it accounts for the rows already read."""
+    def condition(driver):
+        state = driver.execute_script(GRID_PAGER_SCRIPT)
+        if not state["jqgrid"] or state["records"] >= min_records:
+            return state
+        return False
+    return condition
+
+def read_grid_pages(driver, first_page, max_results, extraction="script"):
+    """
+    Reads the remaining pages of a results grid whose first page is `first_page`.
+    Returns (records, total); records is None when the search matched more than
+    `max_results` records (nothing past the first page is read then). Returns None
+    when the pages could not all be read.
+    """
     try:
-        df = pd.read_csv(csv_path, usecols=[1])
-        parcel_numbers = df.iloc[:, 0].dropna().astype(str).str.strip().unique().tolist()
-        print(f"✓ Loaded {len(parcel_numbers)} unique parcel numbers")
-        return parcel_numbers
+        # The pager can lag a grid that was read from its network response
+        pager = WebDriverWait(driver, 5, poll_frequency=0.1).until(pager_caught_up(len(first_page)))
     except Exception as e:
-        print(f"Error reading parcel list: {str(e)}")
+        print(f"Error reading grid pager: {str(e)}")
         return None
+    if not pager["jqgrid"]:
+        pager = None  # Plain markup has no pager: everything the search matched is on this page
+    total = pager["records"] if pager else len(first_page)
+    if total > max_results:
+        return None, total
+
+    records = list(first_page)
+    if pager:
+        driver.execute_script(NETWORK_HOOK_SCRIPT)
+        for page in range(pager["page"] + 1, pager["lastpage"] + 1):
+            before = driver.execute_script(GRID_STATE_SCRIPT)
+            driver.execute_script(GRID_GOTO_PAGE_SCRIPT, page)
+            WebDriverWait(driver, GRID_REFRESH_TIMEOUT, poll_frequency=0.1).until(grid_refreshed(before))
+            rows = extract_property_data(driver, extraction)
+            if rows is None:
+                return None
+            records.extend(rows)
+        if len(records) < total:
+            print(f"Grid reported {total} records but {len(records)} were read")
+            return None
+    return records, total
 
-def process_parcel(driver, parcel_value):
+def process_parcel(driver, parcel_value, profile="human", **search_options):
     """Handles searching a parcel in a separate browser window."""
-    driver.get("https://marshall.countygovservices.com/Property/Property/Search")
-    select_parcel_option(driver)
+    driver.get(SEARCH_URL)
+    select_parcel_option(driver, profile)
 
     try:
         print(f"Processing parcel {parcel_value}...")
-        property_data = search_parcel(driver, parcel_value)
+        property_data = search_parcel(driver, parcel_value, profile=profile, **search_options)
 
-        return property_data if property_data else None
+        return property_data  # [] = no results, None = search failed
     except Exception as e:
         print(f"Error processing {parcel_value}: {str(e)}")
         return None
 
-def parallel_processing(parcel_numbers, output_csv="optimized_results.csv"):
-    """Manages parallel Selenium instances for parcel processing."""
-    drivers = [setup_driver() for _ in range(6)]
-    collected_data = []
+def process_parcel_range(driver, prefix, max_results, profile="human", **search_options):
+    """
+    One search for every parcel starting with `prefix`, read across all grid pages.
+    Same return contract as read_grid_pages; None when the search failed.
+    """
+    driver.get(SEARCH_URL)
+    select_parcel_option(driver, profile)
+
+    try:
+        print(f"Processing parcel range {prefix}*...")
+        first_page = search_parcel(driver, prefix, profile=profile, **search_options)
+        if first_page is None:
+            return None
+        return read_grid_pages(driver, first_page, max_results, search_options.get("extraction", "script"))
+    except Exception as e:
+        print(f"Error processing range {prefix}*: {str(e)}")
+        return None
+
+class ParcelSearcher:
+    """
+    Per-worker search front end. With engine='http' parcels go through the HTTP fast path
+    and a Selenium driver is only started (once) when that path gets an unexpected response.
+    An optional limiter, shared by every worker, paces searches and is told how each one went.
+    search_group() answers a ParcelGroup with one prefix search where the site allows it.
+    """
 
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        for i in range(0, len(parcel_numbers), 6):  # Rotate through parcel batches
-            batch = parcel_numbers[i:i+6]
-            results = executor.map(process_parcel, drivers, batch)
+    def __init__(self, engine="selenium", base_url=None, driver_pool=None, page_report=None, limiter=None,
+                 group_max_results=GROUP_MAX_RESULTS, group_min=3, **search_options):
+        self.engine = engine
+        self.limiter = limiter
+        self.group_max_results = group_max_results
+        self.group_min = group_min
+        self.group_misses = 0
+        self.searches = 0
+        self.driver_pool = driver_pool
+        self.page_report = page_report
+        self.search_options = search_options
+        self.driver = None
+        self.http = None
+        self.fallbacks = 0
+        if engine == "http":
+            from http_engine import HttpSearchEngine, BASE_URL
+            self.http = HttpSearchEngine(base_url or BASE_URL)
 
-            batch_data = []
-            for data in results:
-                if data:
-                    batch_data.extend(data)
+    def get_driver(self):
+        if self.driver is None:
+            self.driver = self.driver_pool.checkout() if self.driver_pool else setup_driver()
+        return self.driver
 
-            collected_data.extend(batch_data)
+    def count_page(self):
+        """Swaps in a fresh browser once the current one has served its quota of pages."""
+        if self.driver is not None and self.driver_pool is not None and self.driver_pool.count_page(self.driver):
+            self.driver = self.driver_pool.recycle(self.driver)
 
-            # Save batch data to CSV file
-            if batch_data:
-                df_batch = pd.DataFrame(batch_data)
-                if i == 0:
-                    df_batch.to_csv(output_csv, mode='w', header=True, index=False)
+    def search(self, parcel_value):
+        return self._paced(self._search, parcel_value)
+
+    def search_group(self, group):
+        """
+        Searches a ParcelGroup's prefix once. Returns ({parcel: rows}, leftovers): the
+        parcels the search answered, and what still has to be searched. A prefix that
+        matched more than `group_max_results` records leaves narrower sub-groups; a failed
+        search, or requested parcels missing from its results, leave single parcels.
+        """
+        if self.group_misses >= GROUP_MISS_LIMIT:
+            return {}, list(group.parcels)
+        result = self._paced(self._search_range, group.prefix)
+        if result is None:
+            return {}, list(group.parcels)
+        records, total = result
+        if records is None:
+            print(f"↪️ Range {group.prefix}* matched {total} records; narrowing it")
+            return {}, split_group(group, self.group_min)
+
+        matches = match_group(group, records)
+        if not matches:
+            # Either none of them exist or the site does not search by prefix; after a few such
+            # groups in a row, stop paying for a range search in front of every single search
+            self.group_misses += 1
+            if self.group_misses == GROUP_MISS_LIMIT:
+                print(f"↪️ {GROUP_MISS_LIMIT} range searches in a row matched nothing; searching parcels one by one")
+            return {}, list(group.parcels)
+        self.group_misses = 0
+        return matches, [parcel_value for parcel_value in group.parcels if parcel_value not in matches]
+
+    def _paced(self, search, value):
+        self.searches += 1
+        if self.limiter is None:
+            return search(value)
+        self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            data = search(value)
+        except Exception as e:
+            self.limiter.record_pushback(type(e).__name__)
+            raise
+        if data is None:
+            self.limiter.record_pushback("failed search")
+        else:
+            self.limiter.record_success(time.monotonic() - started)
+        return data
+
+    def _search_range(self, prefix):
+        try:
+            return process_parcel_range(self.get_driver(), prefix, self.group_max_results, **self.search_options)
+        finally:
+            if self.page_report is not None:
+                self.page_report.record(self.driver)
+            self.count_page()
+
+    def _search(self, parcel_value):
+        if self.http is not None:
+            from http_engine import UnexpectedResponse
+            import requests
+            try:
+                return self.http.search(parcel_value)
+            except (UnexpectedResponse, requests.RequestException) as e:
+                self.fallbacks += 1
+                print(f"↪️ HTTP search failed for {parcel_value} ({str(e)}); falling back to Selenium")
+        try:
+            return process_parcel(self.get_driver(), parcel_value, **self.search_options)
+        finally:
+            if self.page_report is not None:
+                self.page_report.record(self.driver)
+            self.count_page()
+
+    def close(self):
+        if self.driver is not None:
+            if self.driver_pool is not None:
+                self.driver_pool.checkin(self.driver)
+            else:
+                self.driver.quit()
+            self.driver = None
+        if self.http is not None:
+            self.http.close()
+
+def parcel_worker(worker_id, parcel_queue, write_rows, progress, stats, searcher_options, ledger=None):
+    """
+    Pulls searches off the shared queue until it sees the end marker, so no driver waits on a
+    slow neighbour. A queued ParcelGroup is tried as one range search first; whatever it leaves
+    unanswered is searched by this worker before it takes the next item.
+    """
+    worker_stats = {"worker": worker_id, "parcels": 0, "searches": 0, "rows": 0, "empty": 0, "failed": 0,
+                    "fallbacks": 0, "busy_seconds": 0.0}
+    stats[worker_id] = worker_stats
+    searcher = ParcelSearcher(**searcher_options)
+
+    def finish(parcel_value, data, error=None):
+        worker_stats["parcels"] += 1
+        if data:
+            worker_stats["rows"] += len(data)
+            write_rows(data)
+        elif data is None:
+            worker_stats["failed"] += 1
+        else:
+            worker_stats["empty"] += 1
+        record_outcome(ledger, parcel_value, data, error)
+        progress.increment()
+
+    try:
+        while True:
+            item = parcel_queue.get()
+            if item is None:
+                break
+
+            pending = deque([item])
+            while pending:
+                item = pending.popleft()
+                started = time.perf_counter()
+                if isinstance(item, ParcelGroup):
+                    try:
+                        matches, leftovers = searcher.search_group(item)
+                    except Exception as e:
+                        print(f"Worker {worker_id} failed on range {item.prefix}*: {str(e)}")
+                        matches, leftovers = {}, list(item.parcels)
+                    worker_stats["busy_seconds"] += time.perf_counter() - started
+                    for parcel_value, data in matches.items():
+                        finish(parcel_value, data)
+                    pending.extend(leftovers)
                 else:
-                    df_batch.to_csv(output_csv, mode='a', header=False, index=False)
-            print(f"✅ Saved data after processing {i+12} parcels")
+                    error = None
+                    try:
+                        data = searcher.search(item)
+                    except Exception as e:
+                        print(f"Worker {worker_id} failed on {item}: {str(e)}")
+                        data, error = None, e
+                    worker_stats["busy_seconds"] += time.perf_counter() - started
+                    finish(item, data, error)
+                worker_stats["searches"] = searcher.searches
+                worker_stats["fallbacks"] = searcher.fallbacks
+    finally:
+        searcher.close()
+
+    return worker_stats
+
+def record_outcome(ledger, parcel_value, data, error=None):
+    """Marks a parcel done, empty or failed in the ledger (rows must already be written)."""
+    if ledger is None:
+        return
+    if data is None:
+        ledger.record(parcel_value, STATUS_FAILED, error=str(error) if error else None)
+    elif data:
+        ledger.record(parcel_value, STATUS_DONE, rows=len(data))
+    else:
+        ledger.record(parcel_value, STATUS_EMPTY)
+
+class ProgressCounter:
+    """Thread-safe count of finished parcels."""
+
+    def __init__(self, total, report_every):
+        self.total = total
+        self.report_every = max(1, report_every)
+        self._done = 0
+        self._lock = threading.Lock()
+
+    def increment(self):
+        with self._lock:
+            self._done += 1
+            done = self._done
+        if done % self.report_every == 0 or done == self.total:
+            of_total = f"/{self.total}" if self.total is not None else ""
+            print(f"✅ Saved data after processing {done}{of_total} parcels")
+        return done
+
+def async_search_pass(parcel_numbers, write_rows, progress, stats, base_url, concurrency, rate_per_host, ledger=None):
+    """
+    Runs every parcel through the asyncio HTTP core and returns the parcels that
+    got an unexpected response, so they can be retried with Selenium.
+    """
+    from async_engine import run_async_search
+
+    async_stats = {"worker": "async", "parcels": 0, "searches": 0, "rows": 0, "empty": 0, "failed": 0, "fallbacks": 0,
+                   "busy_seconds": 0.0}
+    stats["async"] = async_stats
+    fallback_parcels = []
+
+    def on_result(parcel_value, rows, error):
+        async_stats["searches"] += 1
+        if error is not None:
+            print(f"↪️ Async search failed for {parcel_value} ({str(error)}); queued for Selenium")
+            fallback_parcels.append(parcel_value)
+            async_stats["fallbacks"] += 1
+            return
+        async_stats["parcels"] += 1
+        if rows:
+            async_stats["rows"] += len(rows)
+            write_rows(rows)
+        else:
+            async_stats["empty"] += 1
+        record_outcome(ledger, parcel_value, rows or [])
+        progress.increment()
 
-    for driver in drivers:
-        driver.quit()
+    started = time.perf_counter()
+    run_async_search(parcel_numbers, on_result, base_url=base_url, concurrency=concurrency, rate_per_host=rate_per_host)
+    async_stats["busy_seconds"] = time.perf_counter() - started
+    return fallback_parcels
 
+def print_worker_stats(stats, wall_seconds):
+    """Prints per-worker throughput once the queue has drained."""
+    print("\nWorker throughput:")
+    total_parcels = total_searches = 0
+    for worker_id in sorted(stats, key=str):
+        s = stats[worker_id]
+        total_parcels += s["parcels"]
+        total_searches += s["searches"]
+        rate = s["parcels"] / s["busy_seconds"] if s["busy_seconds"] else 0.0
+        print(f"  Worker {worker_id}: {s['parcels']} parcels in {s['searches']} searches, {s['rows']} rows, "
+              f"{s['empty']} empty, {s['failed']} failed, {s['fallbacks']} Selenium fallbacks, {rate:.2f} parcels/sec")
+    overall = total_parcels / wall_seconds if wall_seconds else 0.0
+    print(f"  Overall: {total_parcels} parcels in {total_searches} searches, {wall_seconds:.1f}s ({overall:.2f} parcels/sec)")
+
+def shard_arg(spec):
+    """argparse type for --shard: a bad spec becomes a usage error instead of a traceback."""
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def default_ledger_path(output_csv):
+    return os.path.splitext(output_csv)[0] + "_ledger.sqlite"
+
+def parallel_processing(parcel_numbers, output_csv="optimized_results.csv", workers=6, engine="selenium", base_url=None,
+                        concurrency=50, rate_per_host=5.0, ledger_path=None, fresh=False, max_pages=200,
+                        blocking=BLOCKING_PROFILE, blocking_report=False, pace=0.0, max_pace=10.0, contexts_per_browser=0,
+                        batch_suffix=0, batch_min=3, batch_max_results=GROUP_MAX_RESULTS, **search_options):
+    """
+    Runs a shared work queue so each worker picks up the next parcel as soon as it is free.
+    Outcomes go to a SQLite ledger; a restarted run skips completed parcels, retries failed
+    ones and appends to the existing output instead of overwriting it.
+    pace > 0 shares an adaptive limiter between the workers, starting at `pace` searches/sec.
+    contexts_per_browser > 0 runs that many workers per Chrome process, each in its own
+    isolated browser context, instead of one Chrome per worker.
+    batch_suffix > 0 groups parcels that differ only in their last `batch_suffix` characters
+    (see search_planner.plan_searches) and searches each group's prefix once in the browser.
+    """
+    if search_options.get("extraction") == "network" and contexts_per_browser > 0:
+        # The performance log is per browser session, so tabs sharing a browser would read each other's traffic
+        raise ValueError("Network extraction cannot be combined with browser contexts; use one or the other")
+
+    ledger = ParcelLedger(ledger_path or default_ledger_path(output_csv))
+    if fresh:
+        ledger.reset()
+
+    summary = ledger.summary()
+    # Only append when the existing output belongs to the run the ledger describes
+    resuming = bool(summary) and os.path.exists(output_csv) and os.path.getsize(output_csv) > 0
+    if summary:
+        print(f"↪️ Resuming from {ledger.path}: skipping {summary.get(STATUS_DONE, 0) + summary.get(STATUS_EMPTY, 0)} "
+              f"completed parcels, retrying {summary.get(STATUS_FAILED, 0)} failed")
+
+    # Lists are filtered up front so progress has a total; streamed input is filtered lazily
+    if isinstance(parcel_numbers, (list, tuple)):
+        parcel_numbers = ledger.pending(parcel_numbers)
+        total_parcels = len(parcel_numbers)
+        workers = min(workers, total_parcels)
+    else:
+        parcel_numbers = ledger.iter_pending(parcel_numbers)
+        total_parcels = None
+
+    write_lock = threading.Lock()
+    header_written = [resuming]
+
+    def write_rows(rows):
+        # Rows are appended as soon as a parcel finishes; the lock keeps lines from interleaving
+        df_rows = pd.DataFrame(rows)
+        with write_lock:
+            if not header_written[0]:
+                df_rows.to_csv(output_csv, mode='w', header=True, index=False)
+                header_written[0] = True
+            else:
+                df_rows.to_csv(output_csv, mode='a', header=False, index=False)
+
+    progress = ProgressCounter(total_parcels, report_every=workers)
+    stats = {}
+    started = time.perf_counter()
+
+    if engine == "async":
+        # Parcels the async fast path could not answer fall through to the Selenium workers below
+        parcel_numbers = async_search_pass(parcel_numbers, write_rows, progress, stats, base_url, concurrency, rate_per_host, ledger)
+        engine = "selenium"
+
+    if isinstance(parcel_numbers, list):
+        workers = min(workers, len(parcel_numbers))
+
+    if batch_suffix > 0:
+        if engine == "selenium":
+            parcel_numbers = plan_searches(parcel_numbers, suffix_length=batch_suffix, min_group=batch_min)
+        else:
+            print("↪️ Range searches need the browser's grid pager; --batch-suffix is ignored with the HTTP engine")
+
+    # A bounded queue fed by a background thread keeps only a few parcels in memory at a time
+    parcel_queue = queue.Queue(maxsize=max(1, workers) * 4)
+
+    def feed_queue():
+        try:
+            for search in parcel_numbers:
+                parcel_queue.put(search)  # A parcel number or a ParcelGroup
+        finally:
+            for _ in range(workers):
+                parcel_queue.put(None)  # One end marker per worker
+
+    # Selenium runs launch every worker's browser in parallel up front, plus one warm spare so
+    # recycling a worn-out browser never waits on Chrome startup. HTTP runs only start one on fallback.
+    selenium_first = engine == "selenium" and workers > 0
+    capture_network = search_options.get("extraction") == "network"
+    if contexts_per_browser > 0:
+        # Workers share browsers; "eager" loads keep a navigation from holding the browser's lock for long
+        driver_pool = ContextPool(lambda: build_chrome_options(blocking, blocking_report, page_load_strategy="eager"),
+                                  contexts_per_browser, max_pages=max_pages,
+                                  on_context=lambda tab: apply_to_driver(tab, blocking, site="marshall"))
+        if selenium_first:
+            print(f"🗂️  {workers} workers in {-(-workers // contexts_per_browser)} browser(s), {contexts_per_browser} isolated contexts each")
+    else:
+        driver_pool = DriverPool(lambda: build_chrome_options(blocking, blocking_report, capture_network=capture_network),
+                                 spares=1 if selenium_first else 0, max_pages=max_pages, max_size=workers + 1,
+                                 on_launch=lambda driver: apply_to_driver(driver, blocking, site="marshall"))
+    page_report = PageWeightReport() if blocking_report else None
+    if selenium_first:
+        driver_pool.prewarm(workers)
+        driver_pool.start()
+    limiter = AdaptiveRateLimiter(pace, max_rate=max(pace, max_pace), capacity=max(1, workers)) if pace > 0 else None
+    searcher_options = dict(search_options, engine=engine, base_url=base_url, driver_pool=driver_pool,
+                            page_report=page_report, limiter=limiter, group_max_results=batch_max_results, group_min=batch_min)
+
+    if workers > 0:
+        threading.Thread(target=feed_queue, daemon=True).start()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(parcel_worker, worker_id, parcel_queue, write_rows, progress, stats, searcher_options, ledger)
+                for worker_id in range(1, workers + 1)
+            ]
+            for future in futures:
+                future.result()
+    driver_pool.close()
+    if page_report is not None:
+        print(f"\n📉 Page weight ({blocking} blocking): {page_report.summary()}")
+
+    print_worker_stats(stats, time.perf_counter() - started)
+    if limiter is not None:
+        print(f"  Final pace: {limiter.describe()}")
+    summary = ledger.summary()
+    ledger.close()
+    if summary.get(STATUS_FAILED):
+        print(f"\n⚠️ {summary[STATUS_FAILED]} parcels failed; run again to retry them.")
     print("\n✅ All parcels processed and saved successfully!")
 
 if __name__ == "__main__":
-    csv_path = "/D:/RNW/Project/Marshall/County_Scrapper/Parcel_List.csv"  # Use Unix-like path for Docker container
-    parcel_numbers = read_parcel_list(csv_path)
+    parser = argparse.ArgumentParser(description="Marshall County parcel scraper")
+    parser.add_argument("csv_path", nargs="?", default="/D:/RNW/Project/Marshall/County_Scrapper/Parcel_List.csv")  # Use Unix-like path for Docker container
+    parser.add_argument("--output", default="optimized_results.csv", help="CSV file the results are written to")
+    parser.add_argument("--workers", type=int, default=6, help="Number of parallel workers")
+    parser.add_argument("--engine", choices=["selenium", "http", "async"], default="selenium",
+                        help="'http' searches without a browser, 'async' does so on the asyncio core; both only post the "
+                             "search form, so they only return rows when the server renders them and otherwise fall back to Selenium")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight for the async engine")
+    parser.add_argument("--rate", type=float, default=5.0, help="Requests per second per host for the async engine")
+    parser.add_argument("--pace", type=float, default=0.0,
+                        help="Starting searches per second shared by all workers; adapts to the site's responses (0 = unpaced)")
+    parser.add_argument("--max-pace", type=float, default=10.0, help="Ceiling for the adaptive --pace")
+    parser.add_argument("--base-url", default=None, help="Override the site root for the HTTP engine (e.g. a local stub server)")
+    parser.add_argument("--ledger", default=None, help="SQLite ledger of parcel outcomes (default: next to the output CSV)")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the ledger and start over, overwriting the output")
+    parser.add_argument("--shard", type=shard_arg, default=None, help="Only process shard k of N (e.g. 2/4); shards are split by parcel hash")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="CSV rows read per chunk")
+    parser.add_argument("--contexts", type=int, default=0,
+                        help="Workers per Chrome process, each in an isolated browser context (0 = one Chrome per worker)")
+    parser.add_argument("--batch-suffix", type=int, default=0,
+                        help="Search parcels that differ only in their last N characters with one prefix search (0 = one search per parcel)")
+    parser.add_argument("--batch-min", type=int, default=3, help="Smallest group worth a prefix search")
+    parser.add_argument("--batch-max-results", type=int, default=GROUP_MAX_RESULTS,
+                        help="A prefix search matching more records than this is narrowed instead of paged through")
+    parser.add_argument("--max-pages", type=int, default=200, help="Parcels a browser serves before it is replaced")
+    parser.add_argument("--blocking", choices=sorted(BLOCKING_PROFILES), default=BLOCKING_PROFILE,
+                        help="Which images/fonts/media/analytics requests the browser skips")
+    parser.add_argument("--blocking-report", action="store_true", help="Report requests and bytes per page and what was blocked")
+    parser.add_argument("--extraction", choices=sorted(EXTRACTION_MODES), default="script", help="How the results grid is read ('network' takes it from the search's network response)")
+    parser.add_argument("--profile", choices=INTERACTION_PROFILES, default="human",
+                        help="'fast' sets the input in one call and waits on the grid instead of fixed sleeps")
+    args = parser.parse_args()
+    if args.extraction == "network" and args.contexts > 0:
+        parser.error("--extraction network cannot be combined with --contexts (the performance log is per browser)")
+
+    shard = args.shard
+    if shard:
+        print(f"Processing shard {shard[0]}/{shard[1]} of {args.csv_path}")
+    parcel_numbers = iter_parcel_numbers(args.csv_path, shard=shard, chunksize=args.chunksize)
 
-    if parcel_numbers:
-        parallel_processing(parcel_numbers)
\ No newline at end of file
+    parallel_processing(parcel_numbers, output_csv=args.output, workers=args.workers,
+                        engine=args.engine, base_url=args.base_url, concurrency=args.concurrency,
+                        rate_per_host=args.rate, ledger_path=args.ledger, fresh=args.fresh,
+                        max_pages=args.max_pages, blocking=args.blocking, blocking_report=args.blocking_report,
+                        extraction=args.extraction, profile=args.profile, pace=args.pace, max_pace=args.max_pace,
+                        contexts_per_browser=args.contexts, batch_suffix=args.batch_suffix, batch_min=args.batch_min,
+                        batch_max_results=args.batch_max_results)
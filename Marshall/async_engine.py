@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sys
+
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.aio_fetch import AsyncFetcher, run_bounded
+from http_engine import (BASE_URL, SEARCH_PATH, DEFAULT_HEADERS, HANDSHAKE_EXPIRED_STATUSES, UnexpectedResponse,
+                         parse_search_form, search_form_fields, parse_search_response)
+
+class AsyncParcelSearch:
+    """
+    Parcel search over the asyncio fetch core. All searches share one connection pool,
+    one cookie jar and one form handshake; the handshake is refreshed when the site
+    stops accepting its token. Like HttpSearchEngine it only posts the search form, so
+    it only returns rows when the server renders them in that response.
+    """
+
+    def __init__(self, fetcher, base_url=BASE_URL):
+        self.fetcher = fetcher
+        self.base_url = base_url.rstrip("/")
+        self.form = None
+        self._handshake_lock = asyncio.Lock()
+
+    @property
+    def search_url(self):
+        return self.base_url + SEARCH_PATH
+
+    async def handshake(self, stale_form=None):
+        async with self._handshake_lock:
+            # Another task may already have refreshed the form while we waited
+            if self.form is not None and self.form is not stale_form:
+                return self.form
+            page = await self.fetcher.get(self.search_url)
+            if page.status != 200:
+                raise UnexpectedResponse(f"Search page returned HTTP {page.status}")
+            self.form = parse_search_form(page.text, page.final_url)
+            return self.form
+
+    async def _submit(self, form, parcel_value):
+        fields = search_form_fields(form, parcel_value)
+        headers = {"Referer": self.search_url, "Origin": self.base_url}
+        if form["method"] == "get":
+            return await self.fetcher.request("GET", form["action"], params=fields, headers=headers)
+        return await self.fetcher.request("POST", form["action"], data=fields, headers=headers)
+
+    async def search(self, parcel_value):
+        """Same contract as HttpSearchEngine.search."""
+        form = self.form or await self.handshake()
+        response = await self._submit(form, parcel_value)
+        if response.status in HANDSHAKE_EXPIRED_STATUSES:
+            form = await self.handshake(stale_form=form)
+            response = await self._submit(form, parcel_value)
+        return parse_search_response(response.status, response.content_type, response.text)
+
+def run_async_search(parcel_numbers, on_result, base_url=None, concurrency=50, rate_per_host=5.0):
+    """
+    Searches every parcel through the asyncio core and calls
+    on_result(parcel_value, rows_or_None, error_or_None) as each one completes.
+    """
+    async def main():
+        async with AsyncFetcher(concurrency=concurrency, rate_per_host=rate_per_host, headers=DEFAULT_HEADERS) as fetcher:
+            searcher = AsyncParcelSearch(fetcher, base_url or BASE_URL)
+
+            async def handle(parcel_value):
+                try:
+                    rows = await searcher.search(parcel_value)
+                except Exception as e:
+                    on_result(parcel_value, None, e)
+                else:
+                    on_result(parcel_value, rows, None)
+
+            await run_bounded(parcel_numbers, handle, concurrency)
+
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+from bs4 import BeautifulSoup
+import json
+import re
+
+# Output column order shared by every extraction mode
+PROPERTY_COLUMNS = ["Pin#", "Description", "Description1", "Account", "Parcel", "Year", "Billing Year", "Pin", "Total Tax", "Balance Due"]
+
+# Grid cell holding each field; Description1 (the address) is optional and defaults to "-"
+GRID_CELL_SELECTORS = {
+    "Pin#": "[aria-describedby='gridResults_PIN']",
+    "Description": "[aria-describedby='gridResults_Description'] .pt-sr-name",
+    "Description1": "[aria-describedby='gridResults_Description'] .pt-sr-address",
+    "Account": "[aria-describedby='gridResults_Account']",
+    "Parcel": "[aria-describedby='gridResults_ParcelNumberFormatted']",
+    "Year": "[aria-describedby='gridResults_tyYEAR']",
+    "Billing Year": "[aria-describedby='gridResults_tyYEAR_BILLING']",
+    "Pin": "[aria-describedby='gridResults_PIN']",
+    "Total Tax": "[aria-describedby='gridResults_TotalTaxDisplay']",
+    "Balance Due": "[aria-describedby='gridResults_BalanceDueDisplay']",
+}
+
+# jqGrid column name behind each field when the grid is delivered as JSON
+GRID_JSON_FIELDS = {
+    "Pin#": "PIN",
+    "Description": "Description",
+    "Account": "Account",
+    "Parcel": "ParcelNumberFormatted",
+    "Year": "tyYEAR",
+    "Billing Year": "tyYEAR_BILLING",
+    "Pin": "PIN",
+    "Total Tax": "TotalTaxDisplay",
+    "Balance Due": "BalanceDueDisplay",
+}
+
+def build_property_record(cells):
+    """Turns raw cell texts (None = cell missing) into a row in PROPERTY_COLUMNS order."""
+    missing = [name for name in PROPERTY_COLUMNS if name != "Description1" and cells.get(name) is None]
+    if missing:
+        raise ValueError(f"Missing grid cells: {', '.join(missing)}")
+
+    data = {}
+    for name in PROPERTY_COLUMNS:
+        value = (cells.get(name) or "").strip()
+        data[name] = value if value or name != "Description1" else "-"
+    return data
+
+def _cell_text(element):
+    """Text of a parsed grid cell, '' for cells jqGrid hides with display:none (as Selenium would)."""
+    for node in [element] + list(element.parents):
+        style = (node.get("style") or "") if hasattr(node, "get") else ""
+        if re.search(r"display\s*:\s*none", style):
+            return ""
+        if node.name == "tr":
+            break
+    return " ".join(element.get_text(" ").split())
+
+def parse_grid_html(html):
+    """
+    Parses #gridResults rows out of an HTML document.
+    Returns a list of records, or None when the page has no results grid at all.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    grid = soup.select_one("#gridResults")
+    if grid is None:
+        return None
+
+    properties = []
+    for row in grid.select("tbody tr"):
+        cells = {}
+        for name, selector in GRID_CELL_SELECTORS.items():
+            element = row.select_one(selector)
+            cells[name] = _cell_text(element) if element is not None else None
+        try:
+            properties.append(build_property_record(cells))
+        except Exception as e:
+            print(f"Error extracting row: {str(e)}")
+    return properties
+
+# Texts the site (or jqGrid's emptyrecords label) shows when a search matched nothing
+NO_RECORDS_MARKERS = ("no records", "no results", "no matching", "no properties found")
+
+def grid_reports_no_records(html):
+    """True when the page explicitly says the search matched nothing."""
+    text = " ".join(BeautifulSoup(html, "html.parser").get_text(" ").split()).lower()
+    return any(marker in text for marker in NO_RECORDS_MARKERS)
+
+def _description_parts(value):
+    """Splits a Description value that may carry the .pt-sr-name / .pt-sr-address markup."""
+    value = "" if value is None else str(value)
+    if "<" not in value:
+        return value, None
+    soup = BeautifulSoup(value, "html.parser")
+    name = soup.select_one(".pt-sr-name")
+    address = soup.select_one(".pt-sr-address")
+    return (
+        " ".join(name.get_text(" ").split()) if name else " ".join(soup.get_text(" ").split()),
+        " ".join(address.get_text(" ").split()) if address else None,
+    )
+
+def grid_json_rows(payload):
+    """Returns the list of row objects from a jqGrid-style payload, or None if the shape is unknown."""
+    if isinstance(payload, dict):
+        for key in ("rows", "Rows", "data", "Data", "records"):
+            if isinstance(payload.get(key), list):
+                return payload[key]
+        if isinstance(payload.get("d"), (list, dict)):  # ASP.NET wraps JSON results in "d"
+            return grid_json_rows(payload["d"])
+        return None
+    if isinstance(payload, list):
+        return payload
+    return None
+
+# Paging keys jqGrid's jsonReader expects next to the row list
+JQGRID_PAGING_KEYS = ("page", "total", "records")
+
+def is_jqgrid_payload(payload):
+    """True for a jqGrid data response: paging keys alongside a row list (ASP.NET "d" wrapper allowed)."""
+    if isinstance(payload, dict) and isinstance(payload.get("d"), dict):
+        payload = payload["d"]
+    return (isinstance(payload, dict) and all(key in payload for key in JQGRID_PAGING_KEYS)
+            and grid_json_rows(payload) is not None)
+
+def parse_grid_json(payload):
+    """
+    Maps a jqGrid JSON payload onto PROPERTY_COLUMNS.
+    Returns a list of records, or None when the payload does not look like the results grid.
+    """
+    if isinstance(payload, (str, bytes)):
+        payload = json.loads(payload)
+    rows = grid_json_rows(payload)
+    if rows is None:
+        return None
+
+    properties = []
+    for row in rows:
+        if isinstance(row, dict) and isinstance(row.get("cell"), dict):
+            row = row["cell"]
+        if not isinstance(row, dict):
+            return None
+        cells = {name: row.get(column) for name, column in GRID_JSON_FIELDS.items()}
+        cells = {name: None if value is None else str(value) for name, value in cells.items()}
+        name, address = _description_parts(row.get("Description"))
+        cells["Description"] = name if row.get("Description") is not None else None
+        cells["Description1"] = address
+        try:
+            properties.append(build_property_record(cells))
+        except Exception as e:
+            print(f"Error extracting row: {str(e)}")
+    return properties
@@ -0,0 +1,147 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+import json
+
+from grid_parsing import grid_reports_no_records, parse_grid_html, parse_grid_json
+
+BASE_URL = "https://marshall.countygovservices.com"
+SEARCH_PATH = "/Property/Property/Search"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+class UnexpectedResponse(Exception):
+    """Raised when the site answers with something the fast path does not understand."""
+
+# Statuses that mean the verification token or session cookie is no longer accepted
+HANDSHAKE_EXPIRED_STATUSES = (400, 403, 419, 440)
+
+def parse_search_form(html, page_url):
+    """
+    Reads the property search form: action URL, method, hidden fields (including the
+    __RequestVerificationToken) and the name of the search text input.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    search_type = soup.select_one("input[name='PropertySearchType']")
+    form = search_type.find_parent("form") if search_type else None
+    if form is None:
+        raise UnexpectedResponse("Property search form not found")
+
+    fields = {}
+    for hidden in form.select("input[type='hidden'][name]"):
+        fields[hidden["name"]] = hidden.get("value", "")
+    if "__RequestVerificationToken" not in fields:
+        token = soup.select_one("input[name='__RequestVerificationToken']")
+        if token is None:
+            raise UnexpectedResponse("Request verification token not found")
+        fields["__RequestVerificationToken"] = token.get("value", "")
+
+    search_input = form.select_one("#pt-search-editor-1")
+    if search_input is None or not search_input.get("name"):
+        raise UnexpectedResponse("Search input not found in form")
+
+    return {
+        "action": urljoin(page_url, form.get("action") or page_url),
+        "method": (form.get("method") or "post").lower(),
+        "fields": fields,
+        "search_field": search_input["name"],
+    }
+
+def search_form_fields(form, parcel_value):
+    """Form payload for a parcel search."""
+    fields = dict(form["fields"])
+    fields["PropertySearchType"] = "parcel"
+    fields[form["search_field"]] = parcel_value
+    return fields
+
+def parse_search_response(status, content_type, body):
+    """
+    Turns a search response into rows ([] when the site says nothing matched).
+    Raises UnexpectedResponse when the answer is not a results grid.
+    """
+    if status != 200:
+        raise UnexpectedResponse(f"Search returned HTTP {status}")
+
+    if "json" in content_type:
+        try:
+            properties = parse_grid_json(body)
+        except (ValueError, json.JSONDecodeError) as e:
+            raise UnexpectedResponse(f"Invalid JSON from search: {e}")
+    else:
+        properties = parse_grid_html(body)
+        # jqGrid fills its rows client-side by XHR, so a row-less grid shell proves nothing;
+        # only an explicit "no records" message makes an empty result
+        if properties == [] and not grid_reports_no_records(body):
+            raise UnexpectedResponse("Results grid has no rows and no 'no records' message")
+
+    if properties is None:
+        raise UnexpectedResponse("Response did not contain the results grid")
+    return properties
+
+class HttpSearchEngine:
+    """
+    Runs the property search over plain HTTP on a keep-alive session.
+    The search form is read once per session to pick up its action URL, hidden fields
+    and the __RequestVerificationToken; the anti-forgery cookie lives in the session.
+
+    Only the search form is posted; the grid's own data request is not made. This only
+    helps when the server renders the result rows (or answers with grid JSON) in that
+    response. On the live site jqGrid loads its rows by a separate XHR, so every search
+    that is not an explicit "no records" page is an UnexpectedResponse and goes to the
+    browser. That is why engine='selenium' is the default.
+    """
+
+    def __init__(self, base_url=BASE_URL, pool_size=4, timeout=15):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.form = None
+
+    @property
+    def search_url(self):
+        return self.base_url + SEARCH_PATH
+
+    def handshake(self):
+        """Loads the search page and records the form the site expects to be posted back."""
+        response = self.session.get(self.search_url, timeout=self.timeout)
+        if response.status_code != 200:
+            raise UnexpectedResponse(f"Search page returned HTTP {response.status_code}")
+        self.form = parse_search_form(response.text, response.url)
+        return self.form
+
+    def _submit(self, parcel_value):
+        fields = search_form_fields(self.form, parcel_value)
+        headers = {"Referer": self.search_url, "Origin": self.base_url}
+        if self.form["method"] == "get":
+            return self.session.get(self.form["action"], params=fields, headers=headers, timeout=self.timeout)
+        return self.session.post(self.form["action"], data=fields, headers=headers, timeout=self.timeout)
+
+    def search(self, parcel_value):
+        """
+        Searches one parcel and returns its rows in PROPERTY_COLUMNS order ([] when the
+        grid is empty). Raises UnexpectedResponse when the answer is not a results grid.
+        """
+        if self.form is None:
+            self.handshake()
+
+        response = self._submit(parcel_value)
+        if response.status_code in HANDSHAKE_EXPIRED_STATUSES:
+            # Token or session expired: refresh the handshake once and retry
+            self.handshake()
+            response = self._submit(parcel_value)
+
+        return parse_search_response(response.status_code, response.headers.get("Content-Type", ""), response.text)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import datetime
+
+STATUS_DONE = "done"      # Search succeeded and rows were written
+STATUS_EMPTY = "empty"    # Search succeeded but the grid had no rows
+STATUS_FAILED = "failed"  # Search errored; retried on the next run
+
+# Parcels in these states are never searched again
+COMPLETED_STATUSES = (STATUS_DONE, STATUS_EMPTY)
+
+class ParcelLedger:
+    """
+    SQLite record of every parcel's outcome, written as each parcel finishes.
+    A restarted run consults it to skip completed parcels and retry failed ones.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS parcels (
+                parcel TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                rows INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+
+    def record(self, parcel_value, status, rows=0, error=None):
+        """Stores the latest outcome for a parcel; commits immediately."""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self.conn.execute("""
+                INSERT INTO parcels (parcel, status, rows, attempts, error, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT(parcel) DO UPDATE SET
+                    status = excluded.status,
+                    rows = excluded.rows,
+                    attempts = parcels.attempts + 1,
+                    error = excluded.error,
+                    updated_at = excluded.updated_at
+            """, (parcel_value, status, rows, error, timestamp))
+
+    def is_completed(self, parcel_value):
+        with self._lock:
+            row = self.conn.execute("SELECT status FROM parcels WHERE parcel = ?", (parcel_value,)).fetchone()
+        return row is not None and row[0] in COMPLETED_STATUSES
+
+    def completed(self):
+        """Set of parcels that do not need to be searched again."""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT parcel FROM parcels WHERE status IN ({','.join('?' * len(COMPLETED_STATUSES))})",
+                COMPLETED_STATUSES,
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def pending(self, parcel_numbers):
+        """Filters out completed parcels; failed and never-seen parcels are kept."""
+        completed = self.completed()
+        return [parcel_value for parcel_value in parcel_numbers if parcel_value not in completed]
+
+    def iter_pending(self, parcel_numbers):
+        """Lazy version of pending() for streamed input; one indexed lookup per parcel."""
+        for parcel_value in parcel_numbers:
+            if not self.is_completed(parcel_value):
+                yield parcel_value
+
+    def summary(self):
+        """Count of parcels per status."""
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM parcels GROUP BY status").fetchall()
+        return dict(rows)
+
+    def reset(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM parcels")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,163 @@
+import base64
+import json
+import time
+from urllib.parse import urlsplit
+
+from grid_parsing import grid_json_rows, grid_reports_no_records, is_jqgrid_payload, parse_grid_html, parse_grid_json
+
+# Resource types the results grid can be delivered as
+GRID_RESOURCE_TYPES = ("XHR", "Fetch", "Document")
+
+# Resource types that can fill an empty grid after its page has loaded
+ASYNC_RESOURCE_TYPES = ("XHR", "Fetch")
+
+# The URL jqGrid loads its rows from, when the grid is already on the page
+GRID_DATA_URL_SCRIPT = """
+const $ = window.jQuery;
+try { return ($ && $('#gridResults').length && $('#gridResults').jqGrid('getGridParam', 'url')) || null; }
+catch (e) { return null; }
+"""
+
+# A page whose grid arrived empty may still fill it by XHR; how long (s) to wait for that
+# once no XHR/fetch is in flight
+EMPTY_DOCUMENT_GRACE = 1.0
+
+def enable_performance_log(options):
+    """Turns on Chrome's performance log, which carries the Network.* events read here."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+def network_events(driver):
+    """Drains the performance log; yields (method, params) of its Network.* events."""
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method", "").startswith("Network."):
+            yield message["method"], message.get("params", {})
+
+def url_path(url):
+    return urlsplit(url or "").path.rstrip("/").lower()
+
+def parse_grid_body(mime_type, body):
+    """
+    Records from a captured response, or None when it is not (conclusively) the results grid.
+    JSON must be a jqGrid payload, with paging keys next to its rows; an HTML grid without
+    rows only counts as empty when the page says nothing matched, as jqGrid may still be
+    fetching its rows.
+    """
+    try:
+        if "json" in mime_type:
+            payload = json.loads(body)
+            if not is_jqgrid_payload(payload):
+                return None
+            records = parse_grid_json(payload)
+            if not records and grid_json_rows(payload):
+                return None  # Rows that all fail to map are not the grid's
+            return records
+        if "html" in mime_type:
+            records = parse_grid_html(body)
+            if records == [] and not grid_reports_no_records(body):
+                return None
+            return records
+    except ValueError:
+        pass
+    return None
+
+class GridResponseCapture:
+    """
+    Reads the results grid straight from the search's network response.
+
+    arm() right before the search is submitted; wait() then watches the performance log
+    for an XHR/fetch (or document) response that finishes loading, pulls its body with
+    Network.getResponseBody and returns the parsed records. The finished response is the
+    wait condition, so there is no rendering wait and no DOM traversal. An empty grid only
+    counts once no XHR/fetch has been in flight for EMPTY_DOCUMENT_GRACE. wait() returns
+    None when nothing conclusive arrived in time (or the log is not enabled); the caller
+    then falls back to reading the rendered grid.
+
+    Only responses from `url_paths` (the search endpoint) or from the URL jqGrid is
+    configured to load its rows from are considered, so other traffic the page sends
+    cannot pass for the grid.
+    """
+
+    def __init__(self, driver, url_paths=()):
+        self.driver = driver
+        self.available = True
+        self.url_paths = {url_path(path) for path in url_paths}
+        self.data_url_path = None
+
+    def arm(self):
+        """Clears older log entries so only the search's own traffic is considered."""
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            for _ in network_events(self.driver):
+                pass
+        except Exception:
+            self.available = False  # Performance log not enabled for this browser
+            return
+        self.read_data_url()
+
+    def read_data_url(self):
+        if self.data_url_path is None:
+            try:
+                self.data_url_path = url_path(self.driver.execute_script(GRID_DATA_URL_SCRIPT)) or None
+            except Exception:
+                pass
+
+    def is_grid_url(self, url):
+        path = url_path(url)
+        if path in self.url_paths:
+            return True
+        self.read_data_url()  # The grid may only have been set up by the search itself
+        return self.data_url_path is not None and path == self.data_url_path
+
+    def response_body(self, request_id):
+        result = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        body = result.get("body", "")
+        if result.get("base64Encoded"):
+            body = base64.b64decode(body).decode("utf-8", errors="replace")
+        return body
+
+    def wait(self, timeout, poll_frequency=0.1):
+        if not self.available:
+            return None
+        candidates = {}  # requestId -> (resource type, mime type) of grid-like responses still loading
+        in_flight = set()  # XHR/fetch requests sent but not finished; any of them may carry the grid
+        empty_document_at = None  # When a document with an empty grid finished loading
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                events = list(network_events(self.driver))
+            except Exception:
+                return None
+            for method, params in events:
+                request_id = params.get("requestId")
+                if method == "Network.requestWillBeSent" and params.get("type") in ASYNC_RESOURCE_TYPES:
+                    in_flight.add(request_id)
+                elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                    in_flight.discard(request_id)
+                    if method == "Network.loadingFailed":
+                        candidates.pop(request_id, None)
+                if method == "Network.responseReceived" and params.get("type") in GRID_RESOURCE_TYPES:
+                    response = params.get("response", {})
+                    if response.get("status") == 200 and self.is_grid_url(response.get("url")):
+                        candidates[request_id] = (params["type"], response.get("mimeType", ""))
+                elif method == "Network.loadingFinished" and request_id in candidates:
+                    resource_type, mime_type = candidates.pop(request_id)
+                    try:
+                        records = parse_grid_body(mime_type, self.response_body(request_id))
+                    except Exception:
+                        continue  # Body already evicted, or not text
+                    if records is None:
+                        continue
+                    if records or resource_type != "Document":
+                        return records
+                    empty_document_at = time.monotonic()  # The grid may be filled by a follow-up XHR
+            if empty_document_at is not None and (candidates or in_flight):
+                empty_document_at = time.monotonic()  # The grace period only counts once the network is quiet
+            elif empty_document_at is not None and time.monotonic() - empty_document_at >= EMPTY_DOCUMENT_GRACE:
+                return []
+            time.sleep(poll_frequency)
+        return None
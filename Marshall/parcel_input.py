@@ -0,0 +1,97 @@
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+import zlib
+
+import pandas as pd
+
+class BloomFilter:
+    """Fixed-size Bloom filter; answers 'definitely new' or 'maybe seen'."""
+
+    def __init__(self, expected_items, false_positive_rate=0.01):
+        expected_items = max(1, expected_items)
+        self.size = max(8, int(-expected_items * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        """Adds value; returns True if it may have been present already."""
+        present = True
+        for position in self._positions(value):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+class SeenSet:
+    """
+    Exact, memory-bounded set of strings. The Bloom filter answers most lookups in
+    memory; only its 'maybe seen' hits are confirmed against a temporary SQLite table.
+    """
+
+    def __init__(self, expected_items=10_000_000):
+        self.bloom = BloomFilter(expected_items)
+        fd, self.path = tempfile.mkstemp(suffix=".sqlite", prefix="parcels_seen_")
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("CREATE TABLE seen (value TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, value):
+        """Returns True if value is new (and records it), False for a duplicate."""
+        if self.bloom.add(value):
+            if self.conn.execute("SELECT 1 FROM seen WHERE value = ?", (value,)).fetchone():
+                return False
+        self.conn.execute("INSERT INTO seen (value) VALUES (?)", (value,))
+        return True
+
+    def close(self):
+        self.conn.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def parse_shard(spec):
+    """Parses a 'k/N' shard spec (1-based k) into (k, N)."""
+    try:
+        k, n = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected k/N such as 1/4")
+    if n < 1 or not 1 <= k <= n:
+        raise ValueError(f"Invalid shard '{spec}', k must be between 1 and N")
+    return k, n
+
+def shard_of(parcel_value, shard_count):
+    """Deterministic 1-based shard for a parcel; identical on every machine and run."""
+    return zlib.crc32(parcel_value.encode("utf-8")) % shard_count + 1
+
+def iter_parcel_numbers(csv_path, shard=None, chunksize=100_000, expected_items=10_000_000):
+    """
+    Streams unique parcel numbers (second CSV column) in file order, reading the CSV in
+    chunks. With shard=(k, N) only parcels that hash to shard k are yielded, so N
+    processes can split one list without coordinating.
+    """
+    seen = SeenSet(expected_items)
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=[1], chunksize=chunksize):
+            for parcel_value in chunk.iloc[:, 0].dropna().astype(str).str.strip():
+                if not parcel_value:
+                    continue
+                if shard is not None and shard_of(parcel_value, shard[1]) != shard[0]:
+                    continue
+                if seen.add(parcel_value):
+                    yield parcel_value
+            seen.conn.commit()
+    finally:
+        seen.close()
@@ -0,0 +1,85 @@
+import re
+from collections import OrderedDict, namedtuple
+
+# One broader search standing in for several parcels that share `prefix`
+ParcelGroup = namedtuple("ParcelGroup", ["prefix", "parcels"])
+
+def parcel_key(value):
+    """Comparison form of a parcel number: separators and case ignored."""
+    return re.sub(r"[^0-9A-Za-z]", "", str(value)).upper()
+
+def group_prefix(parcel_value, suffix_length):
+    """The prefix a parcel is grouped under (its last `suffix_length` characters dropped), or None."""
+    if suffix_length <= 0 or len(parcel_value) <= suffix_length:
+        return None
+    return parcel_value[:-suffix_length]
+
+def _emit(prefix, parcels, min_group):
+    if len(parcels) >= min_group:
+        yield ParcelGroup(prefix, tuple(parcels))
+    else:
+        yield from parcels
+
+def plan_searches(parcel_numbers, suffix_length=5, min_group=3, window=1000):
+    """
+    Streams the searches for `parcel_numbers`: a ParcelGroup for each run of at least
+    `min_group` parcels sharing a prefix, and plain parcel numbers for the rest.
+
+    Parcels are grouped under their first len - `suffix_length` characters, so
+    19-04-17-0-000-047.001, ...048.000 and ...049.000 share 19-04-17-0-000-04. Groups are
+    not capped by size (the searcher narrows a prefix that matches too many records). At
+    most `window` parcels are held back waiting for their group to fill; the oldest group
+    is released first, which keeps sorted (or mostly sorted) lists fully grouped. A parcel
+    arriving after its prefix was released is grouped under a longer prefix instead, so
+    the same prefix is not planned twice.
+    """
+    open_groups = OrderedDict()
+    released = OrderedDict()  # Recently released prefixes; bounded, as sorted input does not revisit old ones
+    held = 0
+    for parcel_value in parcel_numbers:
+        prefix = group_prefix(parcel_value, suffix_length)
+        while prefix is not None and prefix in released:
+            prefix = parcel_value[:len(prefix) + 1] if len(prefix) + 1 < len(parcel_value) else None
+        if prefix is None:
+            yield parcel_value
+            continue
+        open_groups.setdefault(prefix, []).append(parcel_value)
+        held += 1
+        while held > window:
+            oldest, parcels = open_groups.popitem(last=False)
+            held -= len(parcels)
+            released[oldest] = None
+            if len(released) > window * 10:
+                released.popitem(last=False)
+            yield from _emit(oldest, parcels, min_group)
+    for prefix, parcels in open_groups.items():
+        yield from _emit(prefix, parcels, min_group)
+
+def split_group(group, min_group=3):
+    """
+    Narrows a group whose prefix matched too many records: its parcels are regrouped
+    under a prefix one character longer. Sub-groups too small to batch, and parcels
+    the longer prefix would cover completely, become single searches.
+    """
+    length = len(group.prefix) + 1
+    sub_groups = OrderedDict()
+    singles = []
+    for parcel_value in group.parcels:
+        if len(parcel_value) <= length:
+            singles.append(parcel_value)
+        else:
+            sub_groups.setdefault(parcel_value[:length], []).append(parcel_value)
+    searches = []
+    for prefix, parcels in sub_groups.items():
+        searches.extend(_emit(prefix, parcels, min_group))
+    return searches + singles
+
+def match_group(group, records):
+    """{parcel: rows} for the requested parcels found among a prefix search's records."""
+    wanted = {parcel_key(parcel_value): parcel_value for parcel_value in group.parcels}
+    matches = {}
+    for record in records:
+        parcel_value = wanted.get(parcel_key(record.get("Parcel", "")))
+        if parcel_value is not None:
+            matches.setdefault(parcel_value, []).append(record)
+    return matches
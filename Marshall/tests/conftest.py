@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The Marshall modules import each other by bare name, as when Scrapper.py runs from its folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
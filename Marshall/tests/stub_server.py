@@ -0,0 +1,72 @@
+"""
+Local stand-in for the Marshall property search, serving recorded responses.
+
+GET /Property/Property/Search returns the search form; a POST back to it answers with
+the fixture mapped to the searched parcel in RESPONSES. Run it directly and point the
+scraper at it with --engine http --base-url http://127.0.0.1:<port>.
+"""
+import argparse
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SEARCH_PATH = "/Property/Property/Search"
+TOKEN = "stub-token-1"
+
+# Searched parcel -> (status, content type, fixture file)
+RESPONSES = {
+    "19-04-17-0-000-047.001": (200, "text/html; charset=utf-8", "grid.html"),
+    "19-04-17-0-000-048.000": (200, "application/json; charset=utf-8", "grid.json"),
+    "19-04-17-0-000-049.000": (200, "application/json; charset=utf-8", "grid_empty.json"),
+    "19-04-17-0-000-060.000": (200, "text/html; charset=utf-8", "grid_no_records.html"),
+    "19-04-17-0-000-060.001": (200, "text/html; charset=utf-8", "grid_shell.html"),
+    "19-04-17-0-000-060.002": (200, "text/html; charset=utf-8", "unexpected.html"),
+    "19-04-17-0-000-060.003": (500, "text/html; charset=utf-8", "unexpected.html"),
+}
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+class StubHandler(BaseHTTPRequestHandler):
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.split("?")[0] != SEARCH_PATH:
+            return self._send(404, "text/plain", b"not found")
+        self._send(200, "text/html; charset=utf-8", read_fixture("search_form.html"))
+
+    def do_POST(self):
+        if self.path.split("?")[0] != SEARCH_PATH:
+            return self._send(404, "text/plain", b"not found")
+        length = int(self.headers.get("Content-Length") or 0)
+        fields = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+        if fields.get("__RequestVerificationToken") != TOKEN or fields.get("PropertySearchType") != "parcel":
+            return self._send(403, "text/plain", b"bad token")
+        status, content_type, fixture = RESPONSES.get(fields.get("SearchText", ""), (200, "text/html; charset=utf-8", "grid_no_records.html"))
+        self._send(status, content_type, read_fixture(fixture))
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0):
+    """Starts the stub on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Marshall property search")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Serving recorded responses on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,46 @@
+import pytest
+
+from http_engine import HttpSearchEngine, UnexpectedResponse
+from stub_server import start_stub_server
+
+@pytest.fixture(scope="module")
+def engine():
+    server, base_url = start_stub_server()
+    engine = HttpSearchEngine(base_url)
+    yield engine
+    engine.close()
+    server.shutdown()
+
+def test_html_grid(engine):
+    rows = engine.search("19-04-17-0-000-047.001")
+    assert rows == [{
+        "Pin#": "12345", "Description": "DOE JOHN", "Description1": "100 MAIN ST", "Account": "A-77",
+        "Parcel": "19-04-17-0-000-047.001", "Year": "2023", "Billing Year": "2023", "Pin": "12345",
+        "Total Tax": "$1,234.56", "Balance Due": "$0.00",
+    }]
+
+def test_json_grid(engine):
+    rows = engine.search("19-04-17-0-000-048.000")
+    assert len(rows) == 1
+    assert rows[0]["Description"] == "DOE JOHN"
+    assert rows[0]["Description1"] == "100 MAIN ST"
+    assert rows[0]["Year"] == "2023"
+
+def test_empty_json_grid(engine):
+    assert engine.search("19-04-17-0-000-049.000") == []
+
+def test_html_no_records_message(engine):
+    assert engine.search("19-04-17-0-000-060.000") == []
+
+def test_html_grid_shell_without_rows_is_unexpected(engine):
+    # Rows may still be on their way by XHR, so this must fall back to Selenium, not count as empty
+    with pytest.raises(UnexpectedResponse):
+        engine.search("19-04-17-0-000-060.001")
+
+def test_page_without_grid_is_unexpected(engine):
+    with pytest.raises(UnexpectedResponse):
+        engine.search("19-04-17-0-000-060.002")
+
+def test_server_error_is_unexpected(engine):
+    with pytest.raises(UnexpectedResponse):
+        engine.search("19-04-17-0-000-060.003")
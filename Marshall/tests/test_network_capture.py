@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from network_capture import parse_grid_body
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+@pytest.mark.parametrize("mime_type, body", [
+    ("application/json", '{"data": []}'),
+    ("application/json", '{"Data": [], "Success": true}'),
+    ("application/json", "[]"),
+    ("text/html", "<div id=gridResults><table><tbody></tbody></table></div>"),
+])
+def test_unrelated_or_inconclusive_bodies_are_not_a_grid(mime_type, body):
+    assert parse_grid_body(mime_type, body) is None
+
+def test_jqgrid_json_rows():
+    rows = parse_grid_body("application/json", fixture("grid.json"))
+    assert [row["Parcel"] for row in rows] == ["19-04-17-0-000-047.001"]
+
+def test_empty_jqgrid_json_is_empty():
+    assert parse_grid_body("application/json", fixture("grid_empty.json")) == []
+
+def test_html_no_records_message_is_empty():
+    assert parse_grid_body("text/html", fixture("grid_no_records.html")) == []
@@ -0,0 +1 @@
+"""Helpers shared by the Marshall and Legal 500 scrapers."""
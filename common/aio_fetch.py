@@ -0,0 +1,213 @@
+"""
+asyncio fetch core: one shared aiohttp connection pool, a bound on requests in flight
+and a token bucket per host, so concurrency is set by what the site tolerates rather
+than by how many threads we run. BackgroundFetcher keeps one such core running for
+the whole process, for threaded callers.
+"""
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+FetchResult = namedtuple("FetchResult", ["url", "final_url", "status", "content_type", "text", "elapsed"])
+
+# Statuses worth retrying after a pause; anything else is returned to the caller as-is
+RETRY_STATUSES = (429, 502, 503, 504)
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class HostRateLimiter:
+    """Keeps one TokenBucket per host."""
+
+    def __init__(self, rate_per_host, burst=None, host_rates=None):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.host_rates = dict(host_rates or {})
+        self.buckets = {}
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc.lower()
+        if host not in self.buckets:
+            rate = self.host_rates.get(host, self.rate_per_host)
+            self.buckets[host] = TokenBucket(rate, self.burst)
+        return self.buckets[host]
+
+    async def acquire(self, url):
+        await self.bucket(url).acquire()
+
+class AsyncFetcher:
+    """
+    Async context manager around a shared aiohttp session.
+    `concurrency` caps requests in flight, `rate_per_host` caps requests per second per host.
+    `shared_limiter` (a common.rate_limit.RateLimiter) additionally paces requests
+    together with every other thread that uses the same limiter, and is told how each
+    response went so an adaptive limiter can adjust.
+    """
+
+    def __init__(self, concurrency=100, rate_per_host=5.0, burst=None, timeout=30, headers=None,
+                 retries=2, host_rates=None, shared_limiter=None):
+        self.concurrency = concurrency
+        self.limiter = HostRateLimiter(rate_per_host, burst, host_rates)
+        self.shared_limiter = shared_limiter
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.retries = retries
+        self.session = None
+        self._slots = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            # unsafe=True keeps cookies for IP hosts too, e.g. a local stub server
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._slots = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    async def request(self, method, url, **kwargs):
+        """Sends one rate-limited request and returns a FetchResult; raises after the last retry fails."""
+        attempt = 0
+        while True:
+            await self.limiter.acquire(url)
+            if self.shared_limiter:
+                await self.shared_limiter.acquire_async()
+            started = time.monotonic()
+            try:
+                async with self._slots:
+                    async with self.session.request(method, url, **kwargs) as response:
+                        text = await response.text(errors="replace")
+                        result = FetchResult(url, str(response.url), response.status,
+                                             response.headers.get("Content-Type", ""), text,
+                                             time.monotonic() - started)
+                        retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self.shared_limiter:
+                    self.shared_limiter.record_pushback(type(e).__name__)
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            if self.shared_limiter:
+                if result.status in RETRY_STATUSES or result.status == 403:
+                    self.shared_limiter.record_pushback(f"HTTP {result.status}")
+                else:
+                    self.shared_limiter.record_success(result.elapsed)
+
+            if result.status in RETRY_STATUSES and attempt < self.retries:
+                attempt += 1
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt
+                await asyncio.sleep(delay)
+                continue
+            return result
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+async def run_bounded(items, handle, concurrency):
+    """
+    Calls `await handle(item)` for every item with at most `concurrency` running at once.
+    Items are pulled lazily, so `items` can be a generator over millions of entries.
+    """
+    iterator = iter(items)
+
+    async def worker():
+        for item in iterator:
+            await handle(item)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+class BackgroundFetcher:
+    """
+    One long-lived AsyncFetcher on its own event-loop thread, shared by every thread
+    that calls fetch_all(): they share its connection pool (and keep-alive), its cap
+    on requests in flight and its per-host token buckets. The loop starts on first use.
+    """
+
+    def __init__(self, **fetcher_options):
+        self.fetcher_options = fetcher_options
+        self._fetcher = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _running_fetcher(self):
+        with self._lock:
+            if self._fetcher is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="aio-fetch", daemon=True)
+                thread.start()
+                fetcher = AsyncFetcher(**self.fetcher_options)
+                asyncio.run_coroutine_threadsafe(fetcher.__aenter__(), loop).result()
+                self._loop, self._thread, self._fetcher = loop, thread, fetcher
+            return self._fetcher
+
+    def fetch_all(self, urls, **request_options):
+        """
+        Fetches every URL (GET, with `request_options` such as per-call headers) and
+        returns [(url, FetchResult or exception), ...] in the order of `urls`.
+        Blocks the calling thread only.
+        """
+        fetcher = self._running_fetcher()
+        urls = list(urls)
+        results = [None] * len(urls)
+
+        async def main():
+            async def handle(indexed):
+                index, url = indexed
+                try:
+                    results[index] = (url, await fetcher.get(url, **request_options))
+                except Exception as e:
+                    results[index] = (url, e)
+
+            await run_bounded(enumerate(urls), handle, min(fetcher.concurrency, max(1, len(urls))))
+
+        asyncio.run_coroutine_threadsafe(main(), self._loop).result()
+        return results
+
+    def close(self, timeout=10):
+        """Closes the session and stops the loop thread."""
+        with self._lock:
+            if self._fetcher is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._fetcher.__aexit__(None, None, None), self._loop).result(timeout)
+            finally:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout)
+                if not self._thread.is_alive():
+                    self._loop.close()
+                self._fetcher = self._loop = self._thread = None
@@ -0,0 +1,267 @@
+"""
+Many isolated workers inside a few Chrome processes.
+
+Each worker gets a tab in its own browser context (Chrome's incognito-style profile,
+created over CDP with Target.createBrowserContext), so cookies, storage and cache stay
+separate per worker while the browser, GPU and network processes are shared.
+
+A WebDriver session only drives one window at a time, so every worker talks to its
+tab through a ContextTab: a copy of the browser's driver whose commands take the
+browser's lock and switch to the worker's tab first. Commands are serialised per
+browser, but page loads, waits and sleeps in different tabs overlap, which is where
+scrapers spend most of their time. Use an "eager" or "none" page-load strategy so a
+navigation does not hold the lock until every subresource has loaded.
+
+ContextPool has the checkout/checkin/count_page/recycle interface of DriverPool, so a
+scraper can take tabs from it instead of whole browsers.
+"""
+import copy
+import threading
+import time
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.switch_to import SwitchTo
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from common.driver_pool import launch_driver
+
+class ContextBrowser:
+    """One Chrome process hosting up to `capacity` worker contexts."""
+
+    def __init__(self, driver, capacity):
+        self.driver = driver
+        self.capacity = capacity
+        self.lock = threading.RLock()
+        self.home = driver.current_window_handle  # Never used by a worker; commands that need a live tab go here
+        self.current = self.home
+        self.tabs = set()
+        self.reserved = 0  # Slots taken by tabs still being opened
+        self.retiring = False
+        self.pages = 0
+
+    def run(self, handle, driver_command, params=None):
+        """Runs one WebDriver command against the tab `handle`."""
+        with self.lock:
+            if self.current != handle:
+                RemoteWebDriver.execute(self.driver, Command.SWITCH_TO_WINDOW, {"handle": handle})
+                self.current = handle
+            return RemoteWebDriver.execute(self.driver, driver_command, params)
+
+    def cdp(self, cmd, args=None):
+        """A browser-level CDP command, sent through the home tab."""
+        return self.run(self.home, "executeCdpCommand", {"cmd": cmd, "params": args or {}})["value"]
+
+    def open_tab(self, timeout=10):
+        """Creates a fresh browser context with one blank tab; returns its ContextTab."""
+        context_id = self.cdp("Target.createBrowserContext", {"disposeOnDetach": True})["browserContextId"]
+        try:
+            target_id = self.cdp("Target.createTarget", {"url": "about:blank", "browserContextId": context_id})["targetId"]
+            deadline = time.monotonic() + timeout
+            # ChromeDriver names windows by their target id once it has attached to them
+            while target_id not in self.run(self.home, Command.W3C_GET_WINDOW_HANDLES)["value"]:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("New browser context did not show up as a window")
+                time.sleep(0.05)
+        except Exception:
+            self.cdp("Target.disposeBrowserContext", {"browserContextId": context_id})
+            raise
+        tab = make_tab(self, target_id, context_id)
+        with self.lock:
+            self.tabs.add(tab)
+        return tab
+
+    def close_tab(self, tab):
+        """Disposes the tab's browser context (closing the tab and dropping its cookies)."""
+        with self.lock:
+            self.tabs.discard(tab)
+            try:
+                self.cdp("Target.disposeBrowserContext", {"browserContextId": tab.context_id})
+            except Exception:
+                pass
+            if self.current == tab.handle:
+                self.current = None
+
+    def has_room(self):
+        return not self.retiring and len(self.tabs) + self.reserved < self.capacity
+
+    def idle(self):
+        return not self.tabs and not self.reserved
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+class ContextTabMixin:
+    """Routes every command of a driver copy through its ContextBrowser and tab."""
+
+    def execute(self, driver_command, params=None):
+        return self.browser.run(self.handle, driver_command, params)
+
+    def close(self):
+        self.browser.close_tab(self)
+
+    def quit(self):
+        self.browser.close_tab(self)
+
+_tab_classes = {}
+
+def make_tab(browser, handle, context_id):
+    """A shallow copy of the browser's driver (same session) bound to one tab."""
+    driver_class = type(browser.driver)
+    if driver_class not in _tab_classes:
+        _tab_classes[driver_class] = type(f"ContextTab{driver_class.__name__}", (ContextTabMixin, driver_class), {})
+    tab = copy.copy(browser.driver)
+    tab.__class__ = _tab_classes[driver_class]
+    tab.browser = browser
+    tab.handle = handle
+    tab.context_id = context_id
+    tab._switch_to = SwitchTo(tab)
+    return tab
+
+class ContextPool:
+    """
+    Hands out isolated tabs, `contexts_per_browser` to a Chrome process.
+
+    options_factory() builds the ChromeOptions for each browser launch; on_context(tab)
+    runs on every new tab (e.g. to install per-tab request blocking). A tab that has
+    served `max_pages` pages is swapped for a fresh context in the same browser; a
+    browser that has served `max_pages` per context slot stops taking new contexts and
+    is quit once its last tab is returned.
+    """
+
+    def __init__(self, options_factory, contexts_per_browser=4, max_pages=500, on_context=None):
+        self.options_factory = options_factory
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.max_pages = max_pages
+        self.on_context = on_context
+        self._browsers = []
+        self._pages = {}
+        self._launching = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _launch(self, reserve=False):
+        try:
+            browser = ContextBrowser(launch_driver(self.options_factory()), self.contexts_per_browser)
+        except Exception:
+            with self._cond:
+                self._launching -= 1
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            self._launching -= 1
+            if self._closed:
+                browser.quit()
+                raise RuntimeError("Context pool is closed")
+            self._browsers.append(browser)
+            if reserve:
+                browser.reserved += 1
+            self._cond.notify_all()
+        return browser
+
+    def _launch_in_background(self):
+        try:
+            self._launch()
+        except Exception:
+            pass
+
+    def _browser_with_room(self):
+        """A browser that can take another context, waiting for (or starting) one if needed."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Context pool is closed")
+                for browser in self._browsers:
+                    if browser.has_room():
+                        browser.reserved += 1  # Hold the slot until the tab exists
+                        return browser
+                if not self._launching:
+                    self._launching += 1
+                    break
+                self._cond.wait()
+        return self._launch(reserve=True)
+
+    def start(self):
+        return self
+
+    def prewarm(self, workers):
+        """Launches, in parallel, the browsers `workers` contexts will need."""
+        browsers = -(-workers // self.contexts_per_browser)
+        for _ in range(browsers):
+            with self._cond:
+                if self._closed:
+                    return
+                self._launching += 1
+            threading.Thread(target=self._launch_in_background, daemon=True).start()
+
+    def checkout(self):
+        browser = self._browser_with_room()
+        try:
+            tab = browser.open_tab()
+        finally:
+            with self._cond:
+                browser.reserved -= 1
+        if self.on_context:
+            try:
+                self.on_context(tab)
+            except Exception:
+                browser.close_tab(tab)
+                raise
+        with self._cond:
+            self._pages[id(tab)] = 0
+        return tab
+
+    def count_page(self, tab, pages=1):
+        """Records pages served; returns True once the tab is due for a fresh context."""
+        with self._cond:
+            self._pages[id(tab)] = self._pages.get(id(tab), 0) + pages
+            tab.browser.pages += pages
+            if self.max_pages is None:
+                return False
+            if tab.browser.pages >= self.max_pages * self.contexts_per_browser:
+                tab.browser.retiring = True
+            return self._pages[id(tab)] >= self.max_pages
+
+    def pages_served(self, tab):
+        with self._cond:
+            return self._pages.get(id(tab), 0)
+
+    def checkin(self, tab, healthy=True):
+        """Disposes the tab's context; a retiring browser is quit with its last tab."""
+        if tab is None:
+            return
+        browser = tab.browser
+        browser.close_tab(tab)
+        with self._cond:
+            self._pages.pop(id(tab), None)
+            if not healthy:
+                browser.retiring = True  # Its other tabs finish, but it takes no new ones
+            done = (browser.retiring or self._closed) and browser.idle()
+            if done and browser in self._browsers:
+                self._browsers.remove(browser)
+            self._cond.notify_all()
+        if done:
+            browser.quit()
+
+    def recycle(self, tab):
+        """Swaps `tab` for a fresh context (in a new browser if its own is retiring)."""
+        self.checkin(tab)
+        return self.checkout()
+
+    def discard(self, tab, background=False):
+        self.checkin(tab, healthy=False)
+
+    def close(self):
+        """Quits every browser with no tabs checked out and stops new launches."""
+        with self._cond:
+            self._closed = True
+            idle = [browser for browser in self._browsers if browser.idle()]
+            for browser in idle:
+                self._browsers.remove(browser)
+            for browser in self._browsers:
+                browser.retiring = True
+            self._cond.notify_all()
+        for browser in idle:
+            browser.quit()
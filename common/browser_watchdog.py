@@ -0,0 +1,94 @@
+"""
+Resource watchdog for Selenium browsers.
+
+Instead of recycling a browser on a fixed schedule, the scrapers ask the watchdog
+whether this one needs replacing: it samples the resident memory and open handles of
+the chromedriver/Chrome process tree (through psutil, when installed), counts open
+tabs and runs a liveness probe, and only reports a reason to recycle when a threshold
+is crossed or the probe fails. Without psutil only the tab count and probe apply.
+"""
+import sys
+
+from common.driver_pool import is_healthy
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def driver_processes(driver):
+    """The chromedriver process of `driver` and everything it started (Chrome and its helpers)."""
+    if psutil is None:
+        return []
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        return [root] + root.children(recursive=True)
+    except (AttributeError, psutil.Error):
+        return []
+
+def process_handles(process):
+    """Open handles (Windows) or file descriptors (POSIX) of one process."""
+    return process.num_handles() if sys.platform == "win32" else process.num_fds()
+
+class BrowserWatchdog:
+    """
+    Decides when a browser is due for recycling.
+
+    check(driver) returns None while the browser is within `max_rss_mb` (summed over its
+    process tree), `max_handles` and `max_tabs`, and answers the liveness probe;
+    otherwise it returns a short reason. The latest sample of each browser is kept for
+    logging; one watchdog can watch several browsers.
+    """
+
+    def __init__(self, max_rss_mb=1500, max_handles=4000, max_tabs=8):
+        self.max_rss_mb = max_rss_mb
+        self.max_handles = max_handles
+        self.max_tabs = max_tabs
+        self.samples = {}
+
+    def sample(self, driver):
+        """{"rss_mb", "handles", "processes", "tabs"} for the browser; unknown values are None."""
+        rss = handles = None
+        processes = driver_processes(driver)
+        if processes:
+            rss = handles = 0
+            for process in processes:
+                try:
+                    rss += process.memory_info().rss
+                    handles += process_handles(process)
+                except psutil.Error:
+                    continue  # Helper process exited between listing and sampling
+            rss = rss / (1024 * 1024)
+        try:
+            tabs = len(driver.window_handles)
+        except Exception:
+            tabs = None
+        self.samples[id(driver)] = {"rss_mb": rss, "handles": handles, "processes": len(processes), "tabs": tabs}
+        return self.samples[id(driver)]
+
+    def check(self, driver):
+        if not is_healthy(driver):
+            return "health probe failed"
+        sample = self.sample(driver)
+        if sample["rss_mb"] is not None and sample["rss_mb"] > self.max_rss_mb:
+            return f"memory {sample['rss_mb']:.0f} MB over {self.max_rss_mb} MB"
+        if sample["handles"] is not None and sample["handles"] > self.max_handles:
+            return f"{sample['handles']} open handles over {self.max_handles}"
+        if sample["tabs"] is not None and sample["tabs"] > self.max_tabs:
+            return f"{sample['tabs']} tabs left open"
+        return None
+
+    def forget(self, driver):
+        self.samples.pop(id(driver), None)
+
+    def describe(self, driver):
+        sample = self.samples.get(id(driver))
+        if not sample:
+            return "not sampled"
+        parts = []
+        if sample["rss_mb"] is not None:
+            parts.append(f"{sample['rss_mb']:.0f} MB in {sample['processes']} processes")
+            parts.append(f"{sample['handles']} handles")
+        if sample["tabs"] is not None:
+            parts.append(f"{sample['tabs']} tabs")
+        return ", ".join(parts) or "no process data"
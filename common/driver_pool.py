@@ -0,0 +1,255 @@
+"""
+Pool of pre-launched Chrome drivers shared by the scrapers.
+
+The chromedriver binary is resolved once and cached on disk, browsers are launched
+ahead of time on background threads, and callers check drivers out and back in.
+Drivers that fail a health check or have served `max_pages` pages are replaced.
+"""
+import json
+import os
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+# Where the resolved chromedriver path is remembered between runs
+DRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "web_scrapers", "chromedriver.json")
+
+# Re-resolve the driver (version lookup) at most this often
+DRIVER_CACHE_MAX_AGE = 7 * 24 * 3600
+
+_driver_path_lock = threading.Lock()
+_driver_path = None
+
+def resolve_driver_path(cache_file=DRIVER_CACHE_FILE, max_age=DRIVER_CACHE_MAX_AGE):
+    """
+    Returns the chromedriver binary path, calling ChromeDriverManager().install() only
+    when the cached path is missing, stale or points at a file that no longer exists.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                cached = json.load(f)
+            if os.path.exists(cached["path"]) and time.time() - cached["resolved_at"] < max_age:
+                _driver_path = cached["path"]
+                return _driver_path
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        _driver_path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({"path": _driver_path, "resolved_at": time.time()}, f)
+        except OSError:
+            pass  # Caching is an optimisation only
+        return _driver_path
+
+def launch_driver(options):
+    """Starts Chrome with the cached chromedriver binary."""
+    return webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+
+def is_healthy(driver):
+    """Cheap liveness probe: the browser answers a script call."""
+    try:
+        return driver.execute_script("return document.readyState") is not None
+    except Exception:
+        return False
+
+class DriverPool:
+    """
+    Checkout/checkin pool of Chrome drivers.
+
+    options_factory() builds fresh ChromeOptions for every launch (so per-browser
+    settings such as a random user agent still vary). `spares` idle browsers are kept
+    launched in the background; `max_pages` is how many pages a driver serves before
+    it is recycled. With `max_size` set, at most that many browsers exist at once
+    (spares included): checkout() waits for a checkin once the pool is full, and idle
+    browsers are reused instead of piling up.
+    """
+
+    def __init__(self, options_factory, spares=1, max_pages=500, max_size=None, on_launch=None):
+        self.options_factory = options_factory
+        self.spares = spares
+        self.max_pages = max_pages
+        self.max_size = max_size
+        self.on_launch = on_launch
+        self._idle = []
+        self._pages = {}
+        self._live = 0          # Launched or launching, not yet quit
+        self._launching = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._warmer = None
+
+    # --- Launching ---
+
+    def _launch(self):
+        driver = launch_driver(self.options_factory())
+        if self.on_launch:
+            self.on_launch(driver)
+        return driver
+
+    def _launch_idle(self):
+        """Background launch of one spare browser."""
+        try:
+            driver = self._launch()
+        except Exception:
+            with self._cond:
+                self._launching -= 1
+                self._live -= 1
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._launching -= 1
+            if self._closed:
+                self._live -= 1
+                self._quit(driver)
+                return
+            self._pages[id(driver)] = 0
+            self._idle.append(driver)
+            self._cond.notify_all()
+
+    def _has_room(self):
+        return self.max_size is None or self._live < self.max_size
+
+    def _warm_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and not (len(self._idle) + self._launching < self.spares and self._has_room()):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                self._launching += 1
+                self._live += 1
+            self._launch_idle()
+
+    def start(self):
+        """Starts the background warmer that keeps `spares` browsers ready."""
+        if self._warmer is None and self.spares > 0:
+            resolve_driver_path()  # Resolve once up front rather than in every launching thread
+            self._warmer = threading.Thread(target=self._warm_loop, daemon=True)
+            self._warmer.start()
+        return self
+
+    def prewarm(self, count):
+        """Launches `count` browsers in parallel in the background."""
+        resolve_driver_path()
+        for _ in range(count):
+            with self._cond:
+                if self._closed or not self._has_room():
+                    return
+                self._launching += 1
+                self._live += 1
+            threading.Thread(target=self._launch_idle, daemon=True).start()
+
+    # --- Checkout / checkin ---
+
+    def checkout(self, timeout=None):
+        """Returns a healthy driver, waiting for a warm one or launching a new one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if not self._idle and (self._launching or not self._has_room()) and (deadline is None or time.monotonic() < deadline):
+                    # A browser is already starting (waiting for it beats starting another), or the pool is full
+                    self._cond.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+                    continue
+                if self._idle:
+                    driver = self._idle.pop()
+                    self._cond.notify_all()  # Let the warmer replace the spare we took
+                else:
+                    driver = None
+                    self._live += 1
+
+            if driver is None:
+                try:
+                    driver = self._launch()
+                except Exception:
+                    with self._cond:
+                        self._live -= 1
+                        self._cond.notify_all()
+                    raise
+                with self._cond:
+                    self._pages[id(driver)] = 0
+                return driver
+
+            if is_healthy(driver):
+                return driver
+            self.discard(driver)
+
+    def count_page(self, driver, pages=1):
+        """Records pages served; returns True once the driver is due for recycling."""
+        with self._cond:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + pages
+            return self.max_pages is not None and self._pages[id(driver)] >= self.max_pages
+
+    def pages_served(self, driver):
+        with self._cond:
+            return self._pages.get(id(driver), 0)
+
+    def checkin(self, driver, healthy=True):
+        """Returns a driver to the pool, quitting it instead if it is worn out or unhealthy."""
+        if driver is None:
+            return
+        with self._cond:
+            worn_out = self.max_pages is not None and self._pages.get(id(driver), 0) >= self.max_pages
+        if self._closed or not healthy or worn_out or not self._reset(driver):
+            self.discard(driver)
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify_all()
+
+    def recycle(self, driver):
+        """Quits `driver` and returns a fresh (ideally pre-warmed) one."""
+        self.discard(driver)
+        return self.checkout()
+
+    def discard(self, driver, background=False):
+        """Quits a driver and forgets it; background=True quits on a helper thread."""
+        with self._cond:
+            self._pages.pop(id(driver), None)
+            self._live -= 1
+            self._cond.notify_all()
+        if background:
+            threading.Thread(target=self._quit, args=(driver,), daemon=True).start()
+        else:
+            self._quit(driver)
+
+    def _reset(self, driver):
+        """Closes extra tabs and blanks the page so the next user starts clean."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Quits every idle browser and stops background launches."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for driver in idle:
+            self._quit(driver)
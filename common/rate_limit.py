@@ -0,0 +1,122 @@
+"""
+Process-wide rate limiting shared by scraper threads.
+
+One RateLimiter paces every request a process makes to a site, whichever worker
+thread (or asyncio task) makes it. Callers reserve a slot under a lock and then
+sleep outside it, so waiting workers do not block each other's bookkeeping.
+
+AdaptiveRateLimiter adds AIMD feedback: callers report healthy responses and
+pushback (timeouts, error or block pages, throttling statuses), and the rate climbs
+while the site keeps up and is cut back only when it pushes back.
+"""
+import asyncio
+import threading
+import time
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` requests per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = max(0.01, float(rate))
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Takes the next slot and returns how many seconds to wait before using it."""
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        """Blocks the calling thread until its request may go out."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Same as acquire() for asyncio code, without blocking the event loop."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # Feedback hooks; a fixed-rate limiter ignores them
+    def record_success(self, latency=None):
+        pass
+
+    def record_hold(self, reason=None):
+        pass
+
+    def record_pushback(self, reason=None):
+        pass
+
+    def describe(self):
+        return f"{self.rate:.2f} req/s"
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    RateLimiter whose rate follows AIMD between `min_rate` and `max_rate`.
+
+    Every `window` healthy responses add `increase` requests/sec. A pushback multiplies
+    the rate by `decrease`, at most once per `cooldown` seconds so one burst of failures
+    counts once. Responses slower than `slow_latency` seconds, and record_hold() signals
+    (e.g. an interstitial that is not a block), stop the climb without cutting the rate.
+    """
+
+    def __init__(self, rate, min_rate=0.2, max_rate=10.0, increase=0.25, decrease=0.5, window=5,
+                 slow_latency=8.0, cooldown=10.0, capacity=None):
+        super().__init__(rate, capacity)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.slow_latency = slow_latency
+        self.cooldown = cooldown
+        self.pushbacks = 0
+        self.last_pushback = None
+        self._healthy = 0
+        self._last_decrease = float("-inf")
+
+    def _change_rate(self, rate):
+        self._refill()
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+
+    def record_success(self, latency=None):
+        with self._lock:
+            if latency is not None and latency > self.slow_latency:
+                self._healthy = 0
+                return
+            self._healthy += 1
+            if self._healthy >= self.window:
+                self._healthy = 0
+                self._change_rate(self.rate + self.increase)
+
+    def record_hold(self, reason=None):
+        with self._lock:
+            self._healthy = 0
+
+    def record_pushback(self, reason=None):
+        with self._lock:
+            self.pushbacks += 1
+            self.last_pushback = reason
+            self._healthy = 0
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._change_rate(self.rate * self.decrease)
+
+    def describe(self):
+        with self._lock:
+            text = f"{self.rate:.2f} req/s"
+            if self.pushbacks:
+                text += f" ({self.pushbacks} pushbacks, last: {self.last_pushback})"
+            return text
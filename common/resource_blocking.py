@@ -0,0 +1,194 @@
+"""
+Request-blocking profiles for headless Chrome.
+
+Images are switched off through browser preferences (which cover every tab); fonts,
+media and third-party analytics are blocked at the network layer with CDP
+Network.setBlockedURLs. Each site can allowlist the categories it needs to keep
+working (network patterns cannot express per-host exceptions, so allowlists work per
+category). PageWeightReport tallies what a page actually loaded and what was
+blocked, with an estimate of the bytes saved; measure_savings() A/B-loads a page to
+measure the savings.
+"""
+import fnmatch
+import json
+import threading
+
+# URL patterns per resource category (CDP wildcard syntax)
+CATEGORY_PATTERNS = {
+    "image": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*", "*.avif*"],
+    "font": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"],
+    "media": ["*.mp4*", "*.webm*", "*.mp3*", "*.ogg*", "*.m4a*", "*.mov*"],
+    "analytics": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*facebook.net*", "*connect.facebook.*", "*hotjar.com*", "*clarity.ms*", "*nr-data.net*",
+        "*newrelic.com*", "*segment.io*", "*cdn.segment.com*", "*bat.bing.com*", "*snap.licdn.com*",
+        "*ads-twitter.com*", "*static.ads-twitter.com*", "*quantserve.com*", "*scorecardresearch.com*",
+    ],
+}
+
+PROFILES = {
+    "off": [],
+    "light": ["image", "media", "font", "analytics"],
+}
+
+# What each site must keep to stay usable. Both scrapers rely on element visibility,
+# so no profile blocks stylesheets; neither site needs a blocked category back.
+SITE_ALLOWLISTS = {
+    "marshall": {"categories": []},
+    "legal500": {"categories": []},
+}
+
+# Assumed transfer size per blocked request. Blocked requests never report a size, so
+# PageWeightReport's "saved" figure is only an estimate built from these
+TYPICAL_BYTES = {"image": 40_000, "font": 30_000, "media": 500_000, "analytics": 30_000}
+
+def blocked_categories(profile, site=None):
+    allow = SITE_ALLOWLISTS.get(site, {})
+    return [category for category in PROFILES[profile] if category not in allow.get("categories", [])]
+
+def blocked_patterns(profile, site=None):
+    """Network-level patterns for a profile, minus the site's allowlisted categories."""
+    patterns = []
+    for category in blocked_categories(profile, site):
+        if category != "image":  # Images are handled by preferences, in every tab
+            patterns.extend(CATEGORY_PATTERNS[category])
+    return patterns
+
+def categorize(url):
+    """Category whose patterns match a URL, or None."""
+    for category, patterns in CATEGORY_PATTERNS.items():
+        if any(fnmatch.fnmatch(url, pattern) for pattern in patterns):
+            return category
+    return None
+
+def apply_to_options(options, profile, site=None, report=False):
+    """Sets browser preferences for the profile; report=True also enables the performance log."""
+    if profile != "off" and "image" in blocked_categories(profile, site):
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        options.add_argument("--blink-settings=imagesEnabled=false")
+    if report:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+def apply_to_driver(driver, profile, site=None):
+    """Installs the network-level block list on the driver's current tab."""
+    patterns = blocked_patterns(profile, site)
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+# Transfer size and request count of everything the current page loaded
+PAGE_WEIGHT_SCRIPT = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+let bytes = 0;
+for (const e of entries) { bytes += e.transferSize || 0; }
+return {requests: entries.length, bytes: bytes};
+"""
+
+class PageWeightReport:
+    """Per-page tally of requests made, bytes transferred and requests blocked."""
+
+    def __init__(self):
+        self.pages = 0
+        self.requests = 0
+        self.bytes = 0
+        self.blocked = {}
+        self._lock = threading.Lock()
+
+    def _blocked_from_log(self, driver):
+        """Counts requests Chrome refused, per category, from the performance log (if enabled)."""
+        counts = {}
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return counts
+        failed_urls = {}
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            params = message.get("params", {})
+            if message.get("method") == "Network.requestWillBeSent":
+                failed_urls[params.get("requestId")] = params.get("request", {}).get("url", "")
+            elif message.get("method") == "Network.loadingFailed" and params.get("blockedReason"):
+                url = failed_urls.get(params.get("requestId"), "")
+                category = categorize(url) or "other"
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+
+    def record(self, driver):
+        """Adds the current page of `driver` to the report."""
+        try:
+            weight = driver.execute_script(PAGE_WEIGHT_SCRIPT)
+        except Exception:
+            return
+        blocked = self._blocked_from_log(driver)
+        with self._lock:
+            self.pages += 1
+            self.requests += weight["requests"]
+            self.bytes += weight["bytes"]
+            for category, count in blocked.items():
+                self.blocked[category] = self.blocked.get(category, 0) + count
+
+    def summary(self):
+        """One-line summary with per-page averages and estimated savings (see TYPICAL_BYTES)."""
+        with self._lock:
+            if not self.pages:
+                return "No pages recorded."
+            blocked_total = sum(self.blocked.values())
+            saved = sum(TYPICAL_BYTES.get(category, 0) * count for category, count in self.blocked.items())
+            return (f"{self.pages} pages: {self.requests / self.pages:.1f} requests and "
+                    f"{self.bytes / self.pages / 1024:.1f} KB per page; "
+                    f"{blocked_total / self.pages:.1f} requests blocked per page "
+                    f"(estimated ~{saved / self.pages / 1024:.1f} KB saved per page from typical sizes; "
+                    f"run common/resource_blocking.py <url> to measure)")
+
+def measure_savings(url, options_factory, profile, site=None):
+    """
+    Loads `url` once with blocking off and once with `profile`, returning the requests
+    and bytes each load transferred and the difference.
+    """
+    from common.driver_pool import launch_driver
+
+    results = {}
+    for label, active_profile in (("baseline", "off"), ("blocked", profile)):
+        options = apply_to_options(options_factory(), active_profile, site)
+        driver = launch_driver(options)
+        try:
+            apply_to_driver(driver, active_profile, site)
+            driver.get(url)
+            results[label] = driver.execute_script(PAGE_WEIGHT_SCRIPT)
+        finally:
+            driver.quit()
+    results["saved"] = {
+        "requests": results["baseline"]["requests"] - results["blocked"]["requests"],
+        "bytes": results["baseline"]["bytes"] - results["blocked"]["bytes"],
+    }
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+    from selenium.webdriver.chrome.options import Options
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description="Measure what a blocking profile saves on a page")
+    parser.add_argument("url")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="light")
+    parser.add_argument("--site", choices=sorted(SITE_ALLOWLISTS), default=None)
+    args = parser.parse_args()
+
+    def headless_options():
+        options = Options()
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        return options
+
+    result = measure_savings(args.url, headless_options, args.profile, args.site)
+    for label in ("baseline", "blocked", "saved"):
+        print(f"{label:>8}: {result[label]['requests']} requests, {result[label]['bytes'] / 1024:.1f} KB")